@@ -0,0 +1,123 @@
+"""Compare the WSGI (sync DRF views) and the ASGI (async views) paths under concurrency.
+
+Both servers are started with the same number of worker processes, gunicorn serving the WSGI
+application and uvicorn the ASGI one, then ``--requests`` requests to get_total_usd are sent by
+``--concurrency`` clients to each of them:
+
+    python3 benchmarks/async_views.py --token "${JWT_TOKEN}" --order 1 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess  # nosec
+import sys
+import time
+from contextlib import ExitStack
+from typing import List
+
+import httpx
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds to wait for a server to answer after it is started
+STARTUP_TIMEOUT = 30
+
+
+def start_server(stack: ExitStack, command: List[str], url: str) -> None:
+    """Start a server in the background (stopped with the stack) and wait for it to answer."""
+    # pylint: disable=consider-using-with
+    process = stack.enter_context(subprocess.Popen(command, cwd=BACKEND_DIR))  # nosec
+    stack.callback(process.terminate)
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while True:
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.TransportError as error:
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise SystemExit(f'{command[0]} did not start: {error}') from error
+            time.sleep(0.2)
+
+
+async def _worker(
+    client: httpx.AsyncClient, url: str, requests: int, latencies: List[float]
+) -> int:
+    errors = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            response = await client.post(url)
+            errors += response.status_code != 200
+        except httpx.HTTPError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+
+    return errors
+
+
+async def run(url: str, token: str, concurrency: int, requests: int) -> None:
+    latencies: List[float] = []
+    limits = httpx.Limits(max_connections=concurrency)
+    headers = {'Authorization': f'Bearer {token}'}
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        errors = await asyncio.gather(
+            *(_worker(client, url, requests // concurrency, latencies) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f'{url}\n'
+        f'    {len(latencies)} requests, {sum(errors)} errors in {elapsed:.2f}s '
+        f'({len(latencies) / elapsed:.1f} req/s)\n'
+        f'    latency p50 {statistics.median(latencies) * 1000:.1f}ms, '
+        f'p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms'
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--token', required=True, help='JWT access token')
+    parser.add_argument('--order', required=True, type=int, help='id of an existing order')
+    parser.add_argument('--workers', type=int, default=4, help='processes of each server')
+    parser.add_argument('--wsgi-port', type=int, default=8100)
+    parser.add_argument('--asgi-port', type=int, default=8101)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    wsgi_url = f'http://127.0.0.1:{args.wsgi_port}'
+    asgi_url = f'http://127.0.0.1:{args.asgi_port}'
+    with ExitStack() as stack:
+        start_server(
+            stack,
+            [
+                sys.executable, '-m', 'gunicorn', 'service.wsgi:application',
+                '--workers', str(args.workers), '--bind', f'127.0.0.1:{args.wsgi_port}',
+                '--log-level', 'warning',
+            ],
+            wsgi_url
+        )
+        start_server(
+            stack,
+            [
+                sys.executable, '-m', 'uvicorn', 'service.asgi:application',
+                '--workers', str(args.workers), '--port', str(args.asgi_port),
+                '--log-level', 'warning',
+            ],
+            asgi_url
+        )
+
+        for url in (
+            f'{wsgi_url}/api/v1/order/{args.order}/get_total_usd/',
+            f'{asgi_url}/api/v1/async/order/{args.order}/get_total_usd/',
+        ):
+            asyncio.run(run(url, args.token, args.concurrency, args.requests))
+
+
+if __name__ == '__main__':
+    main()
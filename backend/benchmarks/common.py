@@ -0,0 +1,7 @@
+"""Helpers shared by the benchmarks."""
+from typing import List
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, max(0, round(rank / 100 * len(values)) - 1))]
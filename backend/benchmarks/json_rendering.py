@@ -0,0 +1,108 @@
+"""Render time and memory of the product list responses with the DRF and the orjson renderers.
+
+A payload of ``--products`` products serialized by ``ProductSerializer`` (built in memory, no
+database is needed) is rendered ``--repeat`` times by each renderer, the rendered payload is
+parsed back by each parser:
+
+    python3 benchmarks/json_rendering.py --products 10000
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+from typing import Any, Callable, Dict, Tuple
+
+import django
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service.settings')
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.utils import timezone  # noqa: E402
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from ecommerce.models import Product  # noqa: E402
+from ecommerce.parsers import JsonParser  # noqa: E402
+from ecommerce.renderers import JsonRenderer  # noqa: E402
+from ecommerce.serializers import ProductSerializer  # noqa: E402
+
+
+def payload(products: int) -> Dict[str, Any]:
+    """A product list page as ProductViewSet.list answers it."""
+    return {
+        'next': None,
+        'previous': None,
+        'results': ProductSerializer(
+            [
+                Product(
+                    id=uuid.uuid4(),
+                    name=f'product {number}',
+                    price=Decimal(random.randint(100, 1000000)) / 100,
+                    stock=random.randint(0, 1000),
+                    modified=timezone.now(),
+                )
+                for number in range(products)
+            ],
+            many=True
+        ).data,
+    }
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """Best time (in seconds) and peak of the allocated memory (in bytes) of the function."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    data = payload(args.products)
+    content = JSONRenderer().render(data)
+    if JsonRenderer().render(data) != content:
+        raise SystemExit('the renderers output differs')
+
+    print(f'{args.products} products, {len(content) / 1024:.0f} KiB')
+    results = {}
+    for name, function in (
+        ('render JSONRenderer', lambda: JSONRenderer().render(data)),
+        ('render JsonRenderer', lambda: JsonRenderer().render(data)),
+        ('parse JSONParser', lambda: JSONParser().parse(io.BytesIO(content))),
+        ('parse JsonParser', lambda: JsonParser().parse(io.BytesIO(content))),
+    ):
+        results[name] = measure(function, args.repeat)
+        elapsed, peak = results[name]
+        print(f'    {name}: {elapsed * 1000:.1f}ms, peak {peak / 1024:.0f} KiB')
+
+    for operation, drf, fast in (
+        ('render', 'render JSONRenderer', 'render JsonRenderer'),
+        ('parse', 'parse JSONParser', 'parse JsonParser'),
+    ):
+        print(f'{operation}: {results[drf][0] / results[fast][0]:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
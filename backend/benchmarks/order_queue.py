@@ -0,0 +1,148 @@
+"""Acknowledgement latency of the queued orders and throughput of the workers by batch size.
+
+The configured database is seeded (once) with ``--products`` products. First ``--requests`` orders
+are sent to register_order and to enqueue_order through the Django test client, then for each
+``--batch-sizes`` ``--orders`` queued orders are registered by ``--workers`` threads running the
+batches of the ``process_order_requests`` command:
+
+    python3 benchmarks/order_queue.py --orders 2000 --batch-sizes 1 10 100 --workers 2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import django
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service.settings')
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User  # noqa: E402 pylint: disable=imported-auth-user
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks.common import percentile  # noqa: E402
+from ecommerce.models import OrderRequest, Product  # noqa: E402
+from service import settings  # noqa: E402
+
+
+USERNAME = 'benchmark-queue'
+PASSWORD = 'benchmark-password'  # nosec
+
+PRODUCT_STOCK = 1_000_000
+
+
+def seed(products: int) -> List[str]:
+    existing = Product.objects.filter(name__startswith='queue benchmark product ').count()
+    Product.objects.bulk_create(
+        Product(name=f'queue benchmark product {number}', price=random.randint(100, 10000), stock=0)
+        for number in range(existing, products)
+    )
+    product_ids = [
+        str(pk) for pk in Product.objects.filter(name__startswith='queue benchmark product ')
+        .order_by('name').values_list('pk', flat=True)[:products]
+    ]
+    Product.objects.filter(pk__in=product_ids).update(stock=PRODUCT_STOCK, modified=timezone.now())
+
+    user, created = User.objects.get_or_create(username=USERNAME)
+    if created:
+        user.set_password(PASSWORD)
+        user.save()
+
+    return product_ids
+
+
+def random_order(product_ids: List[str]) -> List[Dict[str, Any]]:
+    return [
+        {'cuantity': random.randint(1, 5), 'product': product_id}
+        for product_id in random.sample(product_ids, random.randint(1, 5))
+    ]
+
+
+def acknowledgements(product_ids: List[str], requests: int) -> Dict[str, Dict[str, float]]:
+    client = Client(HTTP_HOST='localhost')
+    token = client.post(
+        '/api/token/', {'username': USERNAME, 'password': PASSWORD}, content_type='application/json'
+    ).json()['access']
+    client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    results = {}
+    for action in ('register_order', 'enqueue_order'):
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.post(
+                f'/api/v1/order/{action}/',
+                {'products': random_order(product_ids)},
+                content_type='application/json'
+            )
+            latencies.append(time.perf_counter() - started)
+
+        latencies.sort()
+        results[action] = {
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+
+    return results
+
+
+def drain(workers: int, batch_size: int) -> int:
+    def run(_: int) -> int:
+        processed = 0
+        try:
+            while True:
+                requests = OrderRequest.objects.process(
+                    batch_size, settings.ORDER_REQUEST_MAX_ATTEMPTS
+                )
+                processed += len(requests)
+                if not requests:
+                    return processed
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(run, range(workers)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=200, help='acknowledged orders per action')
+    parser.add_argument('--orders', type=int, default=2000, help='queued orders per batch size')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    product_ids = seed(args.products)
+    OrderRequest.objects.filter(status=OrderRequest.PENDING).delete()
+
+    for action, stats in acknowledgements(product_ids, args.requests).items():
+        print(f'{action}: p50 {stats["p50_ms"]:.1f}ms, p99 {stats["p99_ms"]:.1f}ms')
+    OrderRequest.objects.filter(status=OrderRequest.PENDING).delete()
+
+    for batch_size in args.batch_sizes:
+        OrderRequest.objects.bulk_create(
+            OrderRequest(products=random_order(product_ids)) for _ in range(args.orders)
+        )
+
+        started = time.perf_counter()
+        processed = drain(args.workers, batch_size)
+        elapsed = time.perf_counter() - started
+        print(
+            f'batch size {batch_size}: {processed} orders in {elapsed:.2f}s, '
+            f'{processed / elapsed:.1f} orders/s ({args.workers} workers)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""Throughput, latency and queries per endpoint of the order workflow under concurrent clients.
+
+The configured database is seeded (once, the data is reused by the next runs) with ``--products``
+products, a hot product and ``--clients`` users. Then every client logs in with a JWT and runs the
+workflow ``--iterations`` times (product list, register_order, get_total, update_order), and in a
+second phase all the clients register orders of the hot product at the same time (its stock spread
+over ``--hot-shards`` shards, see ``ecommerce.models.StockShard``). The requests go
+through the Django test client from threads with a database connection each, no server is needed:
+
+    python3 benchmarks/order_workflow.py --clients 16 --iterations 50 --output before.json
+    python3 benchmarks/order_workflow.py --clients 16 --iterations 50 --baseline before.json
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import django
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service.settings')
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.contrib.auth.models import User  # noqa: E402 pylint: disable=imported-auth-user
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from benchmarks.common import percentile  # noqa: E402
+from ecommerce.models import Product  # noqa: E402
+
+
+PASSWORD = 'benchmark-password'  # nosec
+
+PRODUCT_STOCK = 1_000_000
+
+
+class Recorder:
+    """Latency, queries and outcome of every request, by endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[Tuple[float, int, int]]] = defaultdict(list)
+
+    def request(self, client: Client, endpoint: str, method: str, url: str, **kwargs: Any) -> Any:
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, content_type='application/json', **kwargs)
+            elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.samples[endpoint].append((elapsed, len(context), response.status_code))
+        return response
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            latencies = sorted(sample[0] for sample in samples)
+            endpoints[endpoint] = {
+                'requests': len(samples),
+                'rejected': sum(400 <= status < 500 for _, _, status in samples),
+                'errors': sum(status >= 500 for _, _, status in samples),
+                'throughput': len(samples) / elapsed,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p95_ms': percentile(latencies, 95) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'queries': sum(queries for _, queries, _ in samples) / len(samples),
+                'max_queries': max(queries for _, queries, _ in samples),
+            }
+
+        return {'elapsed': elapsed, 'endpoints': endpoints}
+
+
+def seed(products: int, clients: int, hot_stock: int, hot_shards: int) -> Tuple[List[str], str]:
+    existing = list(
+        Product.objects.filter(name__startswith='benchmark product ')
+        .order_by('name').values_list('pk', flat=True)[:products]
+    )
+    Product.objects.bulk_create(
+        Product(name=f'benchmark product {number}', price=random.randint(100, 10000), stock=0)
+        for number in range(len(existing), products)
+    )
+    product_ids = [
+        str(pk) for pk in Product.objects.filter(name__startswith='benchmark product ')
+        .order_by('name').values_list('pk', flat=True)[:products]
+    ]
+    Product.objects.filter(pk__in=product_ids).update(stock=PRODUCT_STOCK, modified=timezone.now())
+
+    hot_product, _ = Product.objects.update_or_create(
+        name='benchmark hot product', defaults={'price': 1000, 'stock': hot_stock}
+    )
+    Product.objects.shard_stock(hot_product.pk, hot_shards, hot_stock)
+
+    for number in range(clients):
+        user, created = User.objects.get_or_create(username=f'benchmark-{number}')
+        if created:
+            user.set_password(PASSWORD)
+            user.save()
+
+    return product_ids, str(hot_product.pk)
+
+
+def run_clients(clients: int, target: Callable[[int], None]) -> float:
+    def run(number: int) -> None:
+        try:
+            target(number)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(run, range(clients)))
+    return time.perf_counter() - started
+
+
+def login(recorder: Recorder, number: int) -> Client:
+    client = Client(HTTP_HOST='localhost')
+    response = recorder.request(
+        client,
+        'token',
+        'post',
+        '/api/token/',
+        data={'username': f'benchmark-{number}', 'password': PASSWORD}
+    )
+    client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {response.json()["access"]}'
+    return client
+
+
+def workflow(
+    recorder: Recorder, product_ids: List[str], iterations: int, seed_number: int
+) -> Callable[[int], None]:
+    def run(number: int) -> None:
+        rand = random.Random(seed_number + number)
+        client = login(recorder, number)
+
+        for _ in range(iterations):
+            recorder.request(client, 'product list', 'get', '/api/v1/product/?page_size=50')
+
+            lines = [
+                {'cuantity': rand.randint(1, 5), 'product': product_id}
+                for product_id in rand.sample(product_ids, rand.randint(1, 5))
+            ]
+            response = recorder.request(
+                client,
+                'register_order',
+                'post',
+                '/api/v1/order/register_order/',
+                data={'products': lines}
+            )
+            if response.status_code >= 400:
+                continue
+
+            order_id = response.json()['id']
+            recorder.request(client, 'get_total', 'post', f'/api/v1/order/{order_id}/get_total/')
+
+            lines[0]['cuantity'] += 1
+            recorder.request(
+                client,
+                'update_order',
+                'put',
+                f'/api/v1/order/{order_id}/update_order/',
+                data={'products': lines[:1]}
+            )
+
+    return run
+
+
+def hot_product_orders(
+    recorder: Recorder, hot_product_id: str, orders: int
+) -> Callable[[int], None]:
+    def run(number: int) -> None:
+        client = login(recorder, number)
+        for _ in range(orders):
+            recorder.request(
+                client,
+                'register_order (hot product)',
+                'post',
+                '/api/v1/order/register_order/',
+                data={'products': [{'cuantity': 1, 'product': hot_product_id}]}
+            )
+
+    return run
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print('\ncompared to the baseline:')
+    for phase, report in results['phases'].items():
+        for endpoint, stats in report['endpoints'].items():
+            previous = baseline['phases'].get(phase, {}).get('endpoints', {}).get(endpoint)
+            if previous:
+                print(
+                    f'    {phase} / {endpoint}: '
+                    f'throughput {change(stats["throughput"], previous["throughput"])}, '
+                    f'p95 {change(stats["p95_ms"], previous["p95_ms"])}, '
+                    f'queries {change(stats["queries"], previous["queries"])}'
+                )
+
+
+def change(value: float, previous: float) -> str:
+    return f'{(value - previous) / previous * 100:+.1f}%' if previous else 'n/a'
+
+
+def main() -> None:  # pylint: disable=too-many-locals
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--clients', type=int, default=16, help='at most the pool size')
+    parser.add_argument('--iterations', type=int, default=25, help='workflows per client')
+    parser.add_argument('--hot-orders', type=int, default=50, help='hot product orders per client')
+    parser.add_argument('--hot-stock', type=int, default=500)
+    parser.add_argument('--hot-shards', type=int, default=0, help='stock shards of the hot product')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    args = parser.parse_args()
+
+    logging.getLogger('django.request').setLevel(logging.ERROR)  # the expected 4xx responses
+    random.seed(args.seed)
+    product_ids, hot_product_id = seed(args.products, args.clients, args.hot_stock, args.hot_shards)
+
+    results: Dict[str, Any] = {
+        'started_at': timezone.now().isoformat(),
+        'arguments': vars(args),
+        'phases': {},
+    }
+    for phase, target in (
+        ('workflow', lambda rec: workflow(rec, product_ids, args.iterations, args.seed)),
+        ('hot product', lambda rec: hot_product_orders(rec, hot_product_id, args.hot_orders)),
+    ):
+        recorder = Recorder()
+        elapsed = run_clients(args.clients, target(recorder))
+        results['phases'][phase] = recorder.report(elapsed)
+
+    sold = sum(
+        status == 201 for _, _, status in recorder.samples['register_order (hot product)']
+    )
+    stock = Product.objects.get(pk=hot_product_id).total_stock()
+    results['hot_product'] = {
+        'stock': args.hot_stock,
+        'sold': sold,
+        'left': stock,
+        'consistent': sold + stock == args.hot_stock,  # nothing oversold or lost
+    }
+
+    for phase, report in results['phases'].items():
+        print(f'\n{phase} ({args.clients} clients, {report["elapsed"]:.2f}s)')
+        for endpoint, stats in report['endpoints'].items():
+            print(
+                f'    {endpoint}: {stats["requests"]} requests ({stats["rejected"]} rejected, '
+                f'{stats["errors"]} errors), '
+                f'{stats["throughput"]:.1f} req/s, p50 {stats["p50_ms"]:.1f}ms, '
+                f'p95 {stats["p95_ms"]:.1f}ms, p99 {stats["p99_ms"]:.1f}ms, '
+                f'{stats["queries"]:.1f} queries (max {stats["max_queries"]})'
+            )
+    print(f'\nhot product: {results["hot_product"]}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            compare(results, json.load(baseline_file))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
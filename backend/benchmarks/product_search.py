@@ -0,0 +1,103 @@
+"""Query plans and timings of the product list filters on a large catalog.
+
+The catalog is filled up to ``--rows`` generated products (in the configured database), then the
+first page of each scenario is fetched through the product viewset filters and pagination and its
+query is run with ``EXPLAIN (ANALYZE, BUFFERS)``:
+
+    python3 benchmarks/product_search.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import django
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'service.settings')
+django.setup()
+
+# pylint: disable=wrong-import-position
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from ecommerce.models import Product  # noqa: E402
+from ecommerce.views import ProductViewSet  # noqa: E402
+
+
+SCENARIOS = [
+    '',
+    'search=blue',
+    'search=blue shi',
+    'search=blue&ordering=price',
+    'price_min=100&price_max=101&ordering=price',
+    'stock_max=3&ordering=-stock',
+    'ordering=name',
+]
+
+_FILL_SQL = '''
+    INSERT INTO ecommerce_product (
+        id, name, price, price_currency, stock, modified, stock_shards
+    )
+    SELECT
+        gen_random_uuid(),
+        (ARRAY['red', 'blue', 'green', 'black', 'white'])[1 + i %% 5] || ' '
+            || (ARRAY['shirt', 'shoes', 'hat', 'jacket', 'socks', 'bag'])[1 + i / 5 %% 6] || ' '
+            || (ARRAY['small', 'medium', 'large'])[1 + i / 30 %% 3] || ' ' || i,
+        (i * 7919 %% 100000) / 100.0,
+        'ARS',
+        i * 31 %% 1000,
+        now(),
+        0
+    FROM generate_series(%s::bigint, %s::bigint) AS i
+'''
+
+
+def fill(rows: int) -> None:
+    existing = Product.objects.count()
+    if existing < rows:
+        print(f'inserting {rows - existing} products...')
+        with connection.cursor() as cursor:
+            cursor.execute(_FILL_SQL, [existing + 1, rows])
+            cursor.execute('ANALYZE ecommerce_product')
+
+
+def first_page_query(params: str) -> Tuple[str, int]:
+    query = dict(param.split('=') for param in params.split('&') if param)
+    request = Request(APIRequestFactory().get('/api/v1/product/', query, HTTP_HOST='localhost'))
+    view = ProductViewSet(request=request, action='list', format_kwarg=None, kwargs={})
+
+    with CaptureQueriesContext(connection) as context:
+        page = view.paginate_queryset(view.filter_queryset(view.get_queryset()))
+
+    return context.captured_queries[-1]['sql'], len(page or [])
+
+
+def explain(sql: str) -> List[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', maxsplit=1)[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    fill(args.rows)
+    for params in SCENARIOS:
+        started = time.perf_counter()
+        sql, count = first_page_query(params)
+        elapsed = time.perf_counter() - started
+
+        print(f'\n?{params} ({count} products, {elapsed * 1000:.1f}ms)')
+        for line in explain(sql):
+            print(f'    {line}')
+
+
+if __name__ == '__main__':
+    main()
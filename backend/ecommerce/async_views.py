@@ -0,0 +1,148 @@
+"""Async versions of the hot product and order endpoints, served by the ASGI application.
+
+Django 4.0 has no async ORM interface and DRF has no async views, so these are plain async Django
+views: the queries run in the bounded thread pool of ``ecommerce.concurrency`` and the exchange
+rate is fetched with an async HTTP client, a slow upstream does not pin a worker thread.
+"""
+import functools
+import json
+from typing import Any, Awaitable, Callable
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import (APIException, AuthenticationFailed, MethodNotAllowed,
+                                       NotAuthenticated, NotFound, ParseError)
+
+from ecommerce.concurrency import run_sync
+from ecommerce.exceptions import ExchangeRateError, InsufficientStockError
+from ecommerce.exchange import get_exchange_rate_provider
+from ecommerce.idempotency import async_idempotent
+from ecommerce.models import Order, Product
+from ecommerce.serializers import (ApiProductsOrderSerializer, ApiTotalMoneySerializer,
+                                   OrderSerializer, ProductSerializer)
+from service.authentication import CachedJWTAuthentication
+
+
+AsyncView = Callable[..., Awaitable[HttpResponse]]
+
+_authentication = CachedJWTAuthentication()
+
+
+def _error_response(request: HttpRequest, error: APIException) -> JsonResponse:
+    data = error.detail if isinstance(error.detail, (list, dict)) else {'detail': error.detail}
+    response = JsonResponse(data, status=error.status_code, safe=False)
+    if isinstance(error, (AuthenticationFailed, NotAuthenticated)):
+        response['WWW-Authenticate'] = _authentication.authenticate_header(request)
+
+    return response
+
+
+async def _authenticate(request: HttpRequest) -> None:
+    user_auth = await run_sync(_authentication.authenticate, request)
+    if user_auth is None:
+        raise NotAuthenticated()
+
+    request.user, request.auth = user_auth  # type: ignore
+
+
+def api_view(*methods: str) -> Callable[[AsyncView], AsyncView]:
+    """Check the method, authenticate the JWT and turn the API exceptions into JSON responses."""
+    def decorator(view: AsyncView) -> AsyncView:
+        @functools.wraps(view)
+        async def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            try:
+                if request.method not in methods:
+                    raise MethodNotAllowed(request.method)
+
+                await _authenticate(request)
+                response = await view(request, *args, **kwargs)
+            except APIException as error:
+                response = _error_response(request, error)
+
+            return response
+
+        wrapper.csrf_exempt = True  # type: ignore  # authenticated by the token like the DRF views
+        return wrapper
+
+    return decorator
+
+
+async def _get_object(queryset: QuerySet, pk: Any) -> Any:
+    try:
+        return await run_sync(queryset.get, pk=pk)
+    except ObjectDoesNotExist as error:
+        raise NotFound() from error
+
+
+def _json_body(request: HttpRequest) -> Any:
+    try:
+        return json.loads(request.body)
+    except ValueError as error:
+        raise ParseError(f'JSON parse error - {error}') from error
+
+
+@api_view('GET')
+async def product_detail(request: HttpRequest, version: str, pk: Any) -> HttpResponse:
+    # pylint: disable=unused-argument
+    """Retrieve a product."""
+    product = await _get_object(Product.objects.all(), pk)
+    # the stock of a sharded product is read from its shards
+    return JsonResponse(await run_sync(lambda: ProductSerializer(product).data))
+
+
+@api_view('GET')
+async def order_detail(request: HttpRequest, version: str, pk: Any) -> HttpResponse:
+    # pylint: disable=unused-argument
+    """Retrieve a order."""
+    order = await _get_object(Order.objects.all(), pk)
+    return JsonResponse(OrderSerializer(order).data)
+
+
+@api_view('POST')
+@async_idempotent
+async def register_order(request: HttpRequest, version: str) -> HttpResponse:
+    # pylint: disable=unused-argument
+    """Register a order."""
+    data_serializer = ApiProductsOrderSerializer(data=_json_body(request))
+    data_serializer.is_valid(raise_exception=True)
+
+    order_data = [tuple(item.values()) for item in data_serializer.validated_data['products']]
+    product_ids = [item[1] for item in order_data]
+    if len(product_ids) == len(set(product_ids)):  # no duplicate products
+        try:
+            order = await run_sync(Order.objects.register, order_data)
+        except Product.DoesNotExist as error:
+            raise NotFound() from error
+        except InsufficientStockError as error:
+            response = JsonResponse({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            response = JsonResponse(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+    else:
+        response = JsonResponse(
+            {'message': f'duplicate products were detected: {product_ids}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return response
+
+
+@api_view('POST')
+async def get_total_usd(request: HttpRequest, version: str, pk: Any) -> HttpResponse:
+    # pylint: disable=unused-argument
+    """Obtain invoice data USD BLUE."""
+    order = await _get_object(Order.objects.all(), pk)
+    try:
+        dolar_blue = await get_exchange_rate_provider().aget_rate()
+    except ExchangeRateError:
+        response = JsonResponse(
+            {'message': 'error generating the result'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    else:
+        response = JsonResponse(
+            ApiTotalMoneySerializer({'total': order.total.amount / dolar_blue}).data
+        )
+
+    return response
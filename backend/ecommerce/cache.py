@@ -0,0 +1,161 @@
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+
+from service.caching import LRUCache
+
+
+class LocalCacheBackend:
+    """Entries kept in the memory of the process, only the writes of the process invalidate them."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60) -> None:
+        self.ttl = ttl
+
+        self._entries = LRUCache(maxsize, ttl)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+
+    def get(self, key: str) -> Any:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries.set(key, value)
+
+    def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def incr_counter(self, key: str) -> None:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SharedCacheBackend:
+    """Entries kept in a cache of ``CACHES`` shared by the processes (e.g. Redis or Memcached)."""
+
+    def __init__(self, alias: str = 'default', ttl: float = 300) -> None:
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def _cache(self) -> Any:
+        return caches[self.alias]
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value, self.ttl)
+
+    def get_counter(self, key: str) -> int:
+        return self._cache.get(key, 0)
+
+    def incr_counter(self, key: str) -> None:
+        self._cache.add(key, 0, None)  # atomic increment of an existing key that never expires
+        self._cache.incr(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class ResponseCache:
+    """Serialized responses of a model, invalidated by its writes.
+
+    The detail entries are keyed by a version of their object that the writes of the object
+    increment, the list entries by a generation that every write increments (a write may move
+    a row in or out of any page), so the writes invalidate the responses without knowing their
+    keys. The key of a response is taken before its rows are read, a write that commits meanwhile
+    makes the entry unreachable.
+    """
+
+    def __init__(self, namespace: str, backend: Any) -> None:
+        self.namespace = namespace
+        self.backend = backend
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _generation(self) -> int:
+        return self.backend.get_counter(f'{self.namespace}:generation')
+
+    def _version_key(self, pk: Hashable) -> str:
+        return f'{self.namespace}:version:{pk}'
+
+    def detail_key(self, pk: Hashable) -> str:
+        """Key of the detail response of the object at its current version."""
+        version = self.backend.get_counter(self._version_key(pk))
+        return f'{self.namespace}:detail:{pk}:{version}'
+
+    def list_key(self, request: Request) -> str:
+        """Key of the list response of the request at the current generation."""
+        digest = hashlib.sha256(
+            f'{request.accepted_renderer.format} {request.build_absolute_uri()}'.encode()
+        )
+        return f'{self.namespace}:list:{self._generation()}:{digest.hexdigest()}'
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._count(self.backend.get(key))
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        self.backend.set(key, entry)
+
+    def invalidate(self, pks: Iterable[Hashable], using: str = DEFAULT_DB_ALIAS) -> None:
+        """Drop the detail entries of the written objects ``pks`` and all the list entries, now
+        and again when the transaction commits (a read of the old rows may have filled them again
+        meanwhile).
+        """
+        keys = [self._version_key(pk) for pk in pks]
+
+        def invalidate() -> None:
+            for key in keys:
+                self.backend.incr_counter(key)
+            self.backend.incr_counter(f'{self.namespace}:generation')
+
+        invalidate()
+        if connections[using].in_atomic_block:
+            transaction.on_commit(invalidate, using=using)
+
+    def _count(self, entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        """Hits and misses of the process."""
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses}
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self._hits = self._misses = 0
+
+
+@lru_cache(maxsize=None)
+def get_product_cache() -> ResponseCache:
+    """Return the product cache configured in the ``PRODUCT_CACHE`` setting (one per process)."""
+    backend_class = import_string(settings.PRODUCT_CACHE['BACKEND'])
+    return ResponseCache('product', backend_class(**settings.PRODUCT_CACHE.get('OPTIONS', {})))
+
+
+@receiver(setting_changed)
+def _reset_product_cache(setting: str, **kwargs: Any) -> None:
+    # pylint: disable=unused-argument
+    if setting == 'PRODUCT_CACHE':
+        get_product_cache.cache_clear()
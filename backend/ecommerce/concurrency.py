@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from service import settings
+
+
+T = TypeVar('T')
+
+# bounded, each thread keeps its own database connection
+_executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_SYNC_WORKERS, thread_name_prefix='ecommerce-sync'
+)
+
+
+def _with_connection(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # the request signals that recycle the connections are not sent in these threads
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking (ORM) work from async code in the bounded thread pool."""
+    return await sync_to_async(_with_connection, thread_sensitive=False, executor=_executor)(
+        func, *args, **kwargs
+    )
@@ -0,0 +1,172 @@
+import hashlib
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import QuerySet
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from djmoney.models.fields import MoneyField
+from djmoney.utils import get_currency_field_name
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from ecommerce.cache import ResponseCache
+
+
+class ConditionalGetMixin:
+    """ETag and Last-Modified validators for the ``retrieve`` and ``list`` actions of a viewset.
+
+    The validators are computed from the primary key and the ``modified_field`` column only (for a
+    list, of the rows of the requested page), a ``304`` response loads and serializes nothing else.
+    A list is only validated by its ETag, a deleted row does not change the last modification.
+
+    With a response cache (``get_response_cache``) the serialized responses and their validators
+    are served from the cache, the misses read from the primary database so that an entry is never
+    older than the last invalidation.
+
+    The rows with a true ``volatile_field`` change without updating their ``modified_field``, their
+    responses (and the lists that have them) get no validators and are not cached.
+    """
+
+    modified_field = 'modified'
+    volatile_field: Optional[str] = None
+
+    def get_response_cache(self) -> Optional[ResponseCache]:
+        return None
+
+    def get_queryset(self) -> QuerySet:
+        queryset = super().get_queryset()  # type: ignore
+        if self.get_response_cache() is not None:
+            # not the replica: a lagging one would fill the cache again with the rows a write has
+            # just invalidated (the hits read no database)
+            queryset = queryset.using(DEFAULT_DB_ALIAS)
+
+        return queryset
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]  # type: ignore
+        cache = self.get_response_cache()  # pylint: disable=assignment-from-none
+        key = cache.detail_key(pk) if cache is not None else None
+
+        entry = cache.get(key) if cache is not None and key is not None else None
+        if entry is not None:
+            modified, get_response = entry['modified'], partial(Response, entry['data'])
+        else:
+            fields = [self.modified_field, self.volatile_field or self.modified_field]
+            queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+            try:
+                modified, volatile = queryset.filter(
+                    **{self.lookup_field: pk}  # type: ignore
+                ).values_list(*fields).first() or (None, None)
+            except (TypeError, ValueError, ValidationError):
+                modified, volatile = None, None
+
+            # not found (answered by the viewset) or without validators
+            if modified is None or (self.volatile_field and volatile):
+                return super().retrieve(request, *args, **kwargs)  # type: ignore
+
+            get_response = partial(self._retrieve, cache, key)
+
+        return self._conditional_response(
+            request, self._etag(request, [(pk, modified)]), modified, get_response
+        )
+
+    def _retrieve(self, cache: Optional[ResponseCache], key: Optional[str]) -> Response:
+        instance = self.get_object()  # type: ignore
+        data = self.get_serializer(instance).data  # type: ignore
+        if cache is not None and key is not None:
+            # the key has the version read before the queries, like the list keys
+            cache.set(key, {'modified': getattr(instance, self.modified_field), 'data': data})
+
+        return Response(data)
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        cache = self.get_response_cache()  # pylint: disable=assignment-from-none
+        key = cache.list_key(request) if cache is not None else None
+
+        entry = cache.get(key) if cache is not None and key is not None else None
+        if entry is not None:
+            return self._conditional_response(
+                request,
+                entry['etag'],
+                entry['modified'],
+                partial(Response, entry['data']),
+                validate_last_modified=False
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())  # type: ignore
+        page = self.paginate_queryset(  # type: ignore
+            queryset.only(*self._validator_fields(request, queryset))
+        )
+        if page is None:
+            return super().list(request, *args, **kwargs)  # type: ignore
+
+        if self.volatile_field and any(getattr(row, self.volatile_field) for row in page):
+            return super().list(request, *args, **kwargs)  # type: ignore
+
+        rows = [(row.pk, getattr(row, self.modified_field)) for row in page]
+        paginator = self.paginator  # type: ignore
+        etag = self._etag(request, rows, paginator.has_next, paginator.has_previous)
+        modified = max((modified for _, modified in rows), default=None)
+        # ListModelMixin.list serializes the page, not this list: ``self.list`` would run the
+        # validators again (and super() takes no arguments in the nested function)
+        serialize = super().list  # type: ignore
+
+        def get_response() -> HttpResponseBase:
+            response = serialize(request, *args, **kwargs)
+            if cache is not None and key is not None:
+                # the key has the generation read before the queries, a write that happened
+                # meanwhile incremented it and this entry is never read
+                cache.set(key, {'etag': etag, 'modified': modified, 'data': response.data})
+            return response
+
+        return self._conditional_response(
+            request, etag, modified, get_response, validate_last_modified=False
+        )
+
+    def _validator_fields(self, request: Request, queryset: Any) -> Iterable[str]:
+        fields = {'pk', self.modified_field, self.volatile_field or self.modified_field}
+        for ordering in self.paginator.get_ordering(request, queryset, self):  # type: ignore
+            name = ordering.lstrip('-')
+            fields.add(name)
+
+            field = queryset.model._meta.get_field(name)
+            if isinstance(field, MoneyField):  # its position is read from the Money value
+                fields.add(get_currency_field_name(name, field))
+
+        return fields
+
+    @staticmethod
+    def _etag(request: Request, rows: Iterable[Tuple[Any, datetime]], *flags: bool) -> str:
+        digest = hashlib.sha256(request.accepted_renderer.format.encode())
+        for pk, modified in rows:
+            digest.update(f'{pk}:{modified.isoformat()};'.encode())
+        digest.update(repr(flags).encode())
+
+        return f'"{digest.hexdigest()[:32]}"'
+
+    @staticmethod
+    def _conditional_response(
+        request: Request,
+        etag: str,
+        modified: Optional[datetime],
+        get_response: Callable[[], HttpResponseBase],
+        validate_last_modified: bool = True,
+    ) -> HttpResponseBase:
+        last_modified = int(modified.timestamp()) if modified is not None else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified if validate_last_modified else None
+        )
+        if response is None:
+            response = get_response()
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
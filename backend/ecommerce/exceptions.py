@@ -0,0 +1,13 @@
+from typing import Any
+
+
+class InsufficientStockError(Exception):
+    def __init__(self, product_id: Any, stock: int) -> None:
+        super().__init__(f'the product stock is not sufficient: {stock} ({product_id})')
+
+        self.product_id = product_id
+        self.stock = stock
+
+
+class ExchangeRateError(Exception):
+    pass
@@ -0,0 +1,246 @@
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Optional
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from ecommerce.concurrency import run_sync
+from ecommerce.exceptions import ExchangeRateError
+from service.metrics import EXCHANGE_RATE_FETCHES
+
+
+class ExchangeRateProvider(ABC):
+    @abstractmethod
+    def get_rate(self) -> Decimal:
+        """Return the price of one USD in ARS, raise ``ExchangeRateError`` if it is unavailable."""
+
+    async def aget_rate(self) -> Decimal:
+        """Async ``get_rate``, by default it runs in the bounded thread pool."""
+        return await run_sync(self.get_rate)
+
+
+class CircuitBreaker:
+    """Reject calls for ``recovery_timeout`` seconds after ``failure_threshold`` failures in a row.
+
+    Once the timeout is over a single trial call is allowed, its result closes or reopens the
+    circuit.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._opened_at = time.monotonic()  # half-open: let one trial through
+                return True
+            return False
+
+    def is_open(self) -> bool:
+        """Whether ``allow`` would reject a call now, without taking the trial call."""
+        with self._lock:
+            return (
+                self._opened_at is not None
+                and time.monotonic() - self._opened_at < self.recovery_timeout
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.rate: Optional[Decimal] = None
+        self.error: Optional[ExchangeRateError] = None
+
+
+class DolarBlueProvider(ExchangeRateProvider):  # pylint: disable=too-many-instance-attributes
+    """"Dolar Blue" selling rate published by dolarsi.com.
+
+    The rate is cached for ``ttl`` seconds, then served stale for up to ``stale_ttl`` seconds more
+    while it is refreshed in the background. Concurrent cache misses share one upstream request,
+    ``aget_rate`` makes it with an async HTTP client without taking a thread.
+    """
+
+    name = 'Dolar Blue'
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        url: str,
+        timeout: float = 3,
+        ttl: float = 60,
+        stale_ttl: float = 600,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+    ) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._flight: Optional[_Flight] = None
+        self._refreshing = False  # a background refresh was started
+        self._async_flight: Optional['asyncio.Future[Decimal]'] = None
+        self._rate: Optional[Decimal] = None
+        self._fetched_at = 0.0
+
+    def get_rate(self) -> Decimal:
+        rate = self._cached_rate()
+        return rate if rate is not None else self._refresh()
+
+    async def aget_rate(self) -> Decimal:
+        rate = self._cached_rate()
+        if rate is not None:
+            return rate
+
+        flight = self._async_flight
+        if flight is None or flight.done() or flight.get_loop() is not asyncio.get_running_loop():
+            flight = self._async_flight = asyncio.ensure_future(self._afetch())
+
+        return await asyncio.shield(flight)  # a cancelled request does not cancel the others
+
+    def _cached_rate(self) -> Optional[Decimal]:
+        rate = self._rate
+        age = time.monotonic() - self._fetched_at
+        if rate is not None and age < self.ttl:
+            return rate
+
+        if rate is not None and age < self.ttl + self.stale_ttl:
+            # a single background refresh at a time, none while the breaker would reject it
+            with self._lock:
+                refresh = not self._refreshing and not self._breaker.is_open()
+                self._refreshing = self._refreshing or refresh
+            if refresh:
+                threading.Thread(target=self._refresh_quietly, daemon=True).start()
+            return rate
+
+        return None
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self._refresh()
+        except ExchangeRateError:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh(self) -> Decimal:
+        with self._lock:
+            flight = self._flight
+            leader = flight is None
+            if flight is None:
+                flight = self._flight = _Flight()
+
+        if leader:
+            try:
+                flight.rate = self._fetch()
+            except ExchangeRateError as error:
+                flight.error = error
+            finally:
+                with self._lock:
+                    self._flight = None
+                flight.done.set()
+        elif not flight.done.wait(self.timeout * 2):
+            raise ExchangeRateError('timeout waiting for the exchange rate')
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.rate  # type: ignore
+
+    def _fetch(self) -> Decimal:
+        if not self._breaker.allow():
+            EXCHANGE_RATE_FETCHES.labels('circuit_open').inc()
+            raise ExchangeRateError('the exchange rate service is unavailable')
+
+        try:
+            response = self._session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+
+            rate = self.parse(response.json())
+        except (requests.exceptions.RequestException, ValueError, ExchangeRateError) as error:
+            self._breaker.record_failure()
+            EXCHANGE_RATE_FETCHES.labels('error').inc()
+            raise ExchangeRateError(f'error fetching the exchange rate: {error}') from error
+
+        self._breaker.record_success()
+        EXCHANGE_RATE_FETCHES.labels('success').inc()
+        self._rate, self._fetched_at = rate, time.monotonic()
+        return rate
+
+    async def _afetch(self) -> Decimal:
+        if not self._breaker.allow():
+            EXCHANGE_RATE_FETCHES.labels('circuit_open').inc()
+            raise ExchangeRateError('the exchange rate service is unavailable')
+
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(self.url)
+                response.raise_for_status()
+
+            rate = self.parse(response.json())
+        except (httpx.HTTPError, ValueError, ExchangeRateError) as error:
+            self._breaker.record_failure()
+            EXCHANGE_RATE_FETCHES.labels('error').inc()
+            raise ExchangeRateError(f'error fetching the exchange rate: {error}') from error
+
+        self._breaker.record_success()
+        EXCHANGE_RATE_FETCHES.labels('success').inc()
+        self._rate, self._fetched_at = rate, time.monotonic()
+        return rate
+
+    @classmethod
+    def parse(cls, data: Any) -> Decimal:
+        try:
+            selling = next(
+                (val['casa']['venta'] for val in data if val['casa']['nombre'] == cls.name),
+                None
+            )
+            if not selling:
+                raise ExchangeRateError(f'"{cls.name}" was not found')
+
+            return Decimal(selling.replace('.', '').replace(',', '.'))
+        except (KeyError, TypeError, AttributeError, InvalidOperation) as error:
+            raise ExchangeRateError(f'invalid exchange rate data: {error}') from error
+
+
+@lru_cache(maxsize=None)
+def get_exchange_rate_provider() -> ExchangeRateProvider:
+    """Return the provider configured in the ``EXCHANGE_RATE`` setting (shared by the process)."""
+    provider_class = import_string(settings.EXCHANGE_RATE['PROVIDER'])
+    return provider_class(**settings.EXCHANGE_RATE.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def _reset_exchange_rate_provider(setting: str, **kwargs: Any) -> None:
+    # pylint: disable=unused-argument
+    if setting == 'EXCHANGE_RATE':
+        get_exchange_rate_provider.cache_clear()
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from django.db.models import QuerySet
+
+from ecommerce.pagination import after
+
+
+FIELDS = {
+    'order': 'id',
+    'date_time': 'date_time',
+    'total': 'total',
+    'total_currency': 'total_currency',
+    'detail': 'orderdetail__id',
+    'product': 'orderdetail__product_id',
+    'product_name': 'orderdetail__product__name',
+    'cuantity': 'orderdetail__cuantity',
+    'price': 'orderdetail__price',
+    'price_currency': 'orderdetail__price_currency',
+}
+
+
+def iter_order_rows(orders: QuerySet, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """Yield a row per order detail (or per order without details), ``chunk_size`` orders per
+    query.
+
+    Every chunk is a range of the (date_time, id) index after the last order of the previous one,
+    the first rows are sent before the next chunks are read and no transaction or cursor is held
+    open between the chunks.
+    """
+    keys = orders.order_by('date_time', 'id').values_list('date_time', 'id')
+    position = None
+    while True:
+        chunk = list(
+            (keys if position is None else after(keys, ['date_time', 'id'], position))[:chunk_size]
+        )
+        if not chunk:
+            break
+
+        rows = orders.filter(pk__in=[pk for _, pk in chunk]).order_by(
+            'date_time', 'id', 'orderdetail__id'
+        ).values_list(*FIELDS.values())
+        for row in rows:
+            yield {name: _plain(value) for name, value in zip(FIELDS, row)}
+
+        position = chunk[-1]
+
+
+def _plain(value: Any) -> Any:
+    if value is None or isinstance(value, (int, str)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)  # Decimal, UUID
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[str]:
+    """Encode the rows as JSON lines, ``chunk_size`` lines per yielded block."""
+    block: List[str] = []
+    for row in rows:
+        block.append(json.dumps(row) + '\n')
+        if len(block) >= chunk_size:
+            yield ''.join(block)
+            block.clear()
+
+    if block:
+        yield ''.join(block)
+
+
+def iter_csv(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[str]:
+    """Encode the rows as CSV with a header line, ``chunk_size`` lines per yielded block."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(FIELDS))
+    writer.writeheader()
+    for number, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if number % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,63 @@
+from typing import Any, Dict, List
+
+from django.db.models import QuerySet
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.request import Request
+
+from ecommerce.serializers import ApiProductQuerySerializer
+
+
+class ProductFilter(BaseFilterBackend):
+    """Full-text search on the name and range filters on the price and the stock."""
+
+    lookups = {
+        'price_min': 'price__gte',
+        'price_max': 'price__lte',
+        'price_currency': 'price_currency',
+        'stock_min': 'stock__gte',
+        'stock_max': 'stock__lte',
+    }
+
+    def filter_queryset(self, request: Request, queryset: QuerySet, view: Any) -> QuerySet:
+        query_serializer = ApiProductQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query = query_serializer.validated_data
+
+        queryset = queryset.filter(
+            **{lookup: query[param] for param, lookup in self.lookups.items() if param in query}
+        )
+        if 'search' in query:
+            queryset = queryset.search(query['search'])
+
+        return queryset
+
+    def get_schema_operation_parameters(self, view: Any) -> List[Dict[str, Any]]:
+        return [
+            {
+                'name': 'search',
+                'required': False,
+                'in': 'query',
+                'description': 'words the product name has (prefixes of them)',
+                'schema': {'type': 'string'},
+            },
+            *(
+                {
+                    'name': param,
+                    'required': False,
+                    'in': 'query',
+                    'schema': {'type': 'string' if param.startswith('price') else 'integer'},
+                }
+                for param in self.lookups
+            ),
+        ]
+
+
+class KeysetOrderingFilter(OrderingFilter):
+    """Order by one indexed field, the primary key breaks the ties in the same direction."""
+
+    def get_ordering(self, request: Request, queryset: QuerySet, view: Any) -> List[str]:
+        ordering = super().get_ordering(request, queryset, view)[:1]
+        if ordering and ordering[0].lstrip('-') != 'id':
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+
+        return ordering
@@ -0,0 +1,305 @@
+"""``Idempotency-Key`` support for the order writes.
+
+The first response to a key is stored (``IDEMPOTENCY_STORE``) and the repeated requests with the
+key get it back byte for byte, without running again. A repeated request that arrives while the
+first one runs waits for its response. The keys are scoped by user and bound to the request they
+were first sent with, reusing a key for another request is an error.
+"""
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.http.response import HttpResponseBase
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from ecommerce.concurrency import run_sync
+from service.caching import LRUCache
+
+
+HEADER = 'Idempotency-Key'
+
+_MAX_KEY_LENGTH = 255
+
+# marker of a key whose first request is running
+_IN_FLIGHT = 'in-flight'
+
+# the response headers that are replayed with the body
+_REPLAYED_HEADERS = ('Content-Type', 'Location')
+
+# message, status and headers of the response to a request that cannot use its key
+_Error = Tuple[str, int, Dict[str, str]]
+
+_AsyncView = Callable[..., Awaitable[HttpResponse]]
+
+
+class LocalIdempotencyStore:
+    """Responses kept in the memory of the process, the duplicates sent to other processes are not
+    detected.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400, lock_ttl: float = 30) -> None:
+        self.lock_ttl = lock_ttl
+
+        self._entries = LRUCache(maxsize, ttl)
+        self._lock = threading.Lock()
+
+    def add(self, key: str, value: Any) -> bool:
+        with self._lock:
+            if self._entries.get(key) is not None:
+                return False
+
+            self._entries.set(key, value, self.lock_ttl)
+            return True
+
+    def get(self, key: str) -> Any:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._entries.delete(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SharedIdempotencyStore:
+    """Responses kept in a cache of ``CACHES`` shared by the processes (e.g. Redis or Memcached)."""
+
+    def __init__(self, alias: str = 'default', ttl: float = 86400, lock_ttl: float = 30) -> None:
+        self.alias = alias
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    @property
+    def _cache(self) -> Any:
+        return caches[self.alias]
+
+    def add(self, key: str, value: Any) -> bool:
+        return self._cache.add(key, value, self.lock_ttl)
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value, self.ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+@lru_cache(maxsize=None)
+def get_idempotency_store() -> Any:
+    """Return the store configured in the ``IDEMPOTENCY_STORE`` setting (one per process)."""
+    store_class = import_string(settings.IDEMPOTENCY_STORE['BACKEND'])
+    return store_class(**settings.IDEMPOTENCY_STORE.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def _reset_idempotency_store(setting: str, **kwargs: Any) -> None:
+    # pylint: disable=unused-argument
+    if setting == 'IDEMPOTENCY_STORE':
+        get_idempotency_store.cache_clear()
+
+
+def _fingerprint(request: HttpRequest) -> str:
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _store_key(request: HttpRequest, key: str) -> str:
+    return f'idempotency:{request.user.pk}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _check(key: str) -> Optional[_Error]:
+    """The error (message, status and headers) of an invalid key."""
+    if not key or len(key) > _MAX_KEY_LENGTH:
+        return (
+            f'{HEADER} must have 1 to {_MAX_KEY_LENGTH} characters',
+            status.HTTP_400_BAD_REQUEST,
+            {}
+        )
+
+    return None
+
+
+def _replay_or_error(
+    entry: Any, fingerprint: str
+) -> Tuple[Optional[HttpResponse], Optional[_Error]]:
+    """The replayed response of a stored entry, or the error of a claimed key."""
+    if entry == _IN_FLIGHT:
+        return None, (
+            f'a request with this {HEADER} is still running',
+            status.HTTP_409_CONFLICT,
+            {'Retry-After': '1'}
+        )
+    if entry['fingerprint'] != fingerprint:
+        return None, (
+            f'this {HEADER} was used with another request',
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            {}
+        )
+
+    return _replay(entry), None
+
+
+def _error(error: _Error, response_class: Type[HttpResponseBase] = Response) -> HttpResponseBase:
+    message, status_code, headers = error
+    response = response_class({'message': message}, status=status_code)
+    for name, value in headers.items():
+        response[name] = value
+
+    return response
+
+
+def _replay(entry: Dict[str, Any]) -> HttpResponse:
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    response['Idempotent-Replayed'] = 'true'
+
+    return response
+
+
+def _save(store: Any, store_key: str, fingerprint: str, response: HttpResponseBase) -> None:
+    if response.status_code >= 500:
+        store.delete(store_key)
+    else:
+        store.set(store_key, {
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'headers': {name: response[name] for name in _REPLAYED_HEADERS if name in response},
+            'content': response.content,
+        })
+
+
+def idempotent(action: Callable[..., HttpResponseBase]) -> Callable[..., HttpResponseBase]:
+    """Make a viewset action honor the ``Idempotency-Key`` header of its requests.
+
+    Only the responses that are not server errors are stored, a request that failed runs again
+    when it is repeated.
+    """
+    @functools.wraps(action)
+    def wrapper(view: Any, request: Request, *args: Any, **kwargs: Any) -> HttpResponseBase:
+        key = request.headers.get(HEADER)
+        if key is None:
+            return action(view, request, *args, **kwargs)
+        error = _check(key)
+        if error is not None:
+            return _error(error)
+
+        store = get_idempotency_store()
+        store_key = _store_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        entry = _claim(store, store_key)
+        if entry is None:  # the first request with the key
+            try:
+                response = action(view, request, *args, **kwargs)
+                response = view.finalize_response(request, response, *args, **kwargs)
+                response.render()
+            except BaseException:
+                store.delete(store_key)
+                raise
+
+            _save(store, store_key, fingerprint, response)
+            return response
+
+        replay, error = _replay_or_error(entry, fingerprint)
+        return replay if replay is not None else _error(error)  # type: ignore
+
+    return wrapper
+
+
+def async_idempotent(view: _AsyncView) -> _AsyncView:
+    """``idempotent`` for the async views (``ecommerce.async_views``), of authenticated requests.
+
+    The store is shared with the DRF actions, the blocking store calls run in the bounded thread
+    pool and the waits for a running request do not hold a thread.
+    """
+    @functools.wraps(view)
+    async def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        key = request.headers.get(HEADER)
+        if key is None:
+            return await view(request, *args, **kwargs)
+        error = _check(key)
+        if error is not None:
+            return _error(error, JsonResponse)  # type: ignore
+
+        store = get_idempotency_store()
+        store_key = _store_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        entry = await _aclaim(store, store_key)
+        if entry is None:  # the first request with the key
+            try:
+                response = await view(request, *args, **kwargs)
+            except BaseException:
+                await run_sync(store.delete, store_key)
+                raise
+
+            await run_sync(_save, store, store_key, fingerprint, response)
+            return response
+
+        replay, error = _replay_or_error(entry, fingerprint)
+        return replay if replay is not None else _error(error, JsonResponse)  # type: ignore
+
+    return wrapper
+
+
+def _try_claim(store: Any, key: str) -> Tuple[bool, Any]:
+    """Claim the key (True) or return its entry."""
+    if store.add(key, _IN_FLIGHT):
+        return True, None
+
+    return False, store.get(key)
+
+
+def _claim(store: Any, key: str) -> Optional[Any]:
+    """Claim the key and return None, or return its stored response, or ``_IN_FLIGHT`` when its
+    first request is still running after ``IDEMPOTENCY_WAIT`` seconds.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while True:
+        claimed, entry = _try_claim(store, key)
+        if claimed:
+            return None
+        if entry != _IN_FLIGHT and entry is not None:
+            return entry
+        if time.monotonic() >= deadline:
+            return _IN_FLIGHT
+
+        # the first request is running (or has just failed and released the key)
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+
+async def _aclaim(store: Any, key: str) -> Optional[Any]:
+    """Async ``_claim``."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while True:
+        claimed, entry = await run_sync(_try_claim, store, key)
+        if claimed:
+            return None
+        if entry != _IN_FLIGHT and entry is not None:
+            return entry
+        if time.monotonic() >= deadline:
+            return _IN_FLIGHT
+
+        await asyncio.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
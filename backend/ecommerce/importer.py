@@ -0,0 +1,112 @@
+import csv
+import io
+import uuid
+from itertools import count, islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from ecommerce.cache import get_product_cache
+from ecommerce.models import Product
+from ecommerce.serializers import ProductImportSerializer
+
+
+STAGING_TABLE = 'ecommerce_product_import'
+
+COLUMNS = ('id', 'name', 'price', 'price_currency', 'stock')
+
+
+def import_products(records: Iterable[Any], chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """Validate and upsert the product records, yielding a report per chunk.
+
+    A chunk is loaded into a staging table with ``COPY`` and upserted into the product table
+    with one statement, the invalid rows are reported and skipped. Only one chunk is held in
+    memory at a time.
+    """
+    rows = zip(count(1), records)
+    for number in count(1):
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        yield _import_chunk(number, chunk)
+
+
+def _import_chunk(number: int, chunk: List[Tuple[int, Any]]) -> Dict[str, Any]:
+    serializer = ProductImportSerializer()
+
+    products: Dict[uuid.UUID, Dict[str, Any]] = {}
+    errors = []
+    for row, record in chunk:
+        try:
+            product = serializer.run_validation(record)
+        except ValidationError as error:
+            errors.append({'row': row, 'errors': error.detail})
+        else:
+            products[product.get('id') or uuid.uuid4()] = product  # the last row of an id wins
+
+    report: Dict[str, Any] = {
+        'chunk': number, 'rows': len(chunk), 'imported': 0, 'errors': errors
+    }
+    try:
+        with transaction.atomic():
+            report['imported'] = _upsert(products)
+    except DatabaseError as error:
+        report['message'] = f'the chunk could not be imported: {error}'
+
+    return report
+
+
+def _upsert(products: Dict[uuid.UUID, Dict[str, Any]]) -> int:
+    if not products:
+        return 0
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for product_id, product in products.items():
+        writer.writerow(
+            [product_id, product['name'], product['price'], product['price_currency'],
+             product['stock']]
+        )
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    table = quote(Product._meta.db_table)
+    columns = ', '.join(
+        quote(Product._meta.get_field(name).column)
+        for name in (*COLUMNS, 'modified', 'stock_shards')
+    )
+    updates = ', '.join(
+        f'{column} = EXCLUDED.{column}'
+        for column in (
+            quote(Product._meta.get_field(name).column) for name in (*COLUMNS[1:], 'modified')
+        )
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} ('
+            'id uuid, name text, price numeric(14, 2), price_currency varchar(3), stock integer'
+            ')'
+        )
+        cursor.execute(f'TRUNCATE {STAGING_TABLE}')
+        cursor.copy_expert(
+            f'COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT csv)', buffer
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) SELECT *, %s, 0 FROM {STAGING_TABLE} '
+            f'ON CONFLICT ({quote(Product._meta.pk.column)}) DO UPDATE SET {updates} '
+            f'RETURNING {quote(Product._meta.pk.column)}, '
+            f'{quote(Product._meta.get_field("stock_shards").column)}',
+            [timezone.now()]
+        )
+        upserted = cursor.fetchall()
+
+    # the shards of a sharded product keep their own stock, the imported stock replaces it
+    for product_id, shards in sorted(upserted):
+        if shards:
+            Product.objects.shard_stock(product_id, shards, products[product_id]['stock'])
+
+    get_product_cache().invalidate([product_id for product_id, _ in upserted])
+    return len(upserted)
@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from service.schema import generate_schema, render_schema
+
+
+FORMATS = {'yaml': 'openapi', 'yml': 'openapi', 'json': 'openapi-json'}
+
+
+class Command(BaseCommand):
+    help = 'Write the OpenAPI schema to a file, served from memory when set as OPENAPI_SCHEMA_FILE.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='YAML or JSON file')
+        parser.add_argument(
+            '--format',
+            choices=['yaml', 'json'],
+            help='file format, by default it is guessed from the file extension'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        file_format = options['format'] or options['path'].rpartition('.')[2]
+        if file_format not in FORMATS:
+            raise CommandError(f'unknown file format: {file_format}, use --format')
+
+        with open(options['path'], 'wb') as schema_file:
+            schema_file.write(render_schema(generate_schema(), FORMATS[file_format]))
+
+        self.stdout.write(f'OpenAPI schema written to {options["path"]}')
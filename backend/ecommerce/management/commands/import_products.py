@@ -0,0 +1,54 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ecommerce import importer
+from ecommerce.parsers import iter_csv, iter_ndjson
+from service import settings
+
+
+class Command(BaseCommand):
+    help = 'Create or update products from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='CSV or NDJSON file, "-" reads the standard input')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='file format, by default it is guessed from the file extension'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.PRODUCT_IMPORT_CHUNK_SIZE,
+            help='rows validated and loaded per statement'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        file_format = options['format'] or options['path'].rpartition('.')[2]
+        if file_format not in ('csv', 'ndjson'):
+            raise CommandError(f'unknown file format: {file_format}, use --format')
+
+        iter_records = iter_csv if file_format == 'csv' else iter_ndjson
+        with self._open(options['path']) as lines:
+            rows = imported = 0
+            for chunk in importer.import_products(iter_records(lines), options['chunk_size']):
+                rows += chunk['rows']
+                imported += chunk['imported']
+
+                self.stdout.write(
+                    f'chunk {chunk["chunk"]}: {chunk["imported"]} of {chunk["rows"]} rows imported'
+                )
+                if 'message' in chunk:
+                    self.stderr.write(chunk['message'])
+                for error in chunk['errors']:
+                    self.stderr.write(f'row {error["row"]}: {error["errors"]}')
+
+        self.stdout.write(f'{imported} of {rows} rows imported')
+
+    @staticmethod
+    def _open(path: str) -> Any:
+        if path == '-':
+            return open(0, 'rb', closefd=False)  # pylint: disable=consider-using-with
+
+        return open(path, 'rb')  # pylint: disable=consider-using-with
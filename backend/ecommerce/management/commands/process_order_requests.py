@@ -0,0 +1,53 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from ecommerce.models import OrderRequest
+from service import settings
+from service.metrics import QUEUED_ORDERS
+
+
+class Command(BaseCommand):
+    help = 'Register the queued orders (enqueue_order), a batch per transaction.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.ORDER_REQUEST_BATCH_SIZE,
+            help='orders registered per transaction'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=0.5,
+            help='seconds to wait for new orders when the queue is empty'
+        )
+        parser.add_argument(
+            '--once', action='store_true', help='exit when the queue is empty'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        while True:
+            requests = OrderRequest.objects.process(
+                options['batch_size'], settings.ORDER_REQUEST_MAX_ATTEMPTS
+            )
+
+            outcomes = {status: 0 for status, _ in OrderRequest._meta.get_field('status').choices}
+            for order_request in requests:
+                outcomes[order_request.status] += 1
+            for outcome, count in outcomes.items():
+                if count:
+                    QUEUED_ORDERS.labels(outcome).inc(count)
+
+            if requests:
+                self.stdout.write(
+                    f'{len(requests)} orders: {outcomes[OrderRequest.ACCEPTED]} accepted, '
+                    f'{outcomes[OrderRequest.REJECTED]} rejected, '
+                    f'{outcomes[OrderRequest.PENDING]} retried'
+                )
+            if len(requests) < options['batch_size']:  # the queue is empty
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
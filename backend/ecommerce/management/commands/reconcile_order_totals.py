@@ -0,0 +1,71 @@
+from decimal import Decimal
+from typing import Any, List
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+from djmoney.money import Money
+
+from ecommerce.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the stored order totals from their details (at the prices they were ordered '
+        'with) and fix the ones that drifted.'
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--dry-run', action='store_true', help='report the drifted totals without fixing them'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='orders locked, read and written per transaction'
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        checked = drifted = 0
+        last_pk = None
+        while True:
+            # the orders of a batch stay locked from the computation of their totals until the fix,
+            # update_order locks the order too, so a total it commits meanwhile is not overwritten
+            with transaction.atomic():
+                orders = Order.objects.order_by('pk')
+                if last_pk is not None:
+                    orders = orders.filter(pk__gt=last_pk)
+                if not options['dry_run']:
+                    orders = orders.select_for_update()
+                batch = list(orders.values_list('pk', flat=True)[:options['batch_size']])
+                if not batch:
+                    break
+
+                checked += len(batch)
+                drifted += self._fix(batch, options['dry_run'])
+                last_pk = batch[-1]
+
+        self.stdout.write(f'{checked} orders checked, {drifted} drifted')
+
+    def _fix(self, batch: List[int], dry_run: bool) -> int:
+        orders = Order.objects.filter(pk__in=batch).annotate(
+            computed_total=Coalesce(
+                Sum(F('orderdetail__cuantity') * F('orderdetail__price')),
+                Value(Decimal(0)),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
+        ).order_by('pk').values_list('pk', 'total', 'total_currency', 'computed_total')
+
+        drifted = []
+        for pk, total, currency, computed_total in orders:
+            computed_total = computed_total.quantize(Decimal('0.01'))
+            if total != computed_total:
+                self.stdout.write(
+                    f'order {pk}: stored {total} {currency}, computed {computed_total} {currency}'
+                )
+                drifted.append(Order(pk=pk, total=Money(computed_total, currency)))
+
+        if drifted and not dry_run:
+            Order.objects.bulk_update(drifted, ['total', 'total_currency'])
+
+        return len(drifted)
@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from ecommerce.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Spread the stock of a (flash-sale) product over shards that take concurrent orders.'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('product', help='product id')
+        parser.add_argument('shards', type=int, help='number of shards, 0 removes them')
+        parser.add_argument('--stock', type=int, help='new stock of the product')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['shards'] < 0 or (options['stock'] is not None and options['stock'] < 0):
+            raise CommandError('the shards and the stock can not be negative')
+
+        try:
+            product = Product.objects.shard_stock(
+                options['product'], options['shards'], options['stock']
+            )
+        except (Product.DoesNotExist, ValidationError) as error:
+            raise CommandError(f'product not found: {options["product"]}') from error
+
+        self.stdout.write(
+            f'{product.name}: {product.total_stock()} in stock over {product.stock_shards} shards'
+        )
@@ -1,8 +1,128 @@
+import re
 import uuid
-from typing import Any, Dict, Tuple
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from django.db import models, transaction
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import DatabaseError, connections, models, transaction
+from django.db.models import Case, F, Q, Subquery, Sum, Value, When
+from django.utils import timezone
 from djmoney.models.fields import MoneyField
+from djmoney.money import Money
+
+from ecommerce.cache import get_product_cache
+from ecommerce.exceptions import InsufficientStockError
+from service.metrics import STOCK_CONFLICTS
+
+
+# the "simple" configuration only lowercases, the names are not stemmed as words of a language
+NAME_SEARCH_VECTOR = SearchVector('name', config='simple')
+
+
+def product_key(product_id: Any) -> Optional[uuid.UUID]:
+    """Normalize a product id received from a client, ``None`` if it is not a valid id."""
+    try:
+        return uuid.UUID(str(product_id))
+    except ValueError:
+        return None
+
+
+class ProductQuerySet(models.QuerySet):
+    def search(self, text: str) -> 'ProductQuerySet':
+        """Filter the products with a word starting with each word of ``text`` in their name."""
+        words = re.findall(r'\w+', text)
+        if not words:
+            return self
+
+        query = SearchQuery(
+            ' & '.join(f'{word}:*' for word in words), config='simple', search_type='raw'
+        )
+        # the same expression as the index
+        return self.alias(name_search=NAME_SEARCH_VECTOR).filter(name_search=query)
+
+    def add_stock(self, deltas: Dict[uuid.UUID, int]) -> int:
+        """Apply the stock deltas with one conditional UPDATE and return the updated rows.
+
+        A product with a negative delta is only updated if it has enough stock. The UPDATE would
+        lock the products in the order of its scan, they are locked in primary key order first so
+        that the concurrent writes of the same products wait for each other instead of
+        deadlocking.
+        """
+        deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+        if not deltas:
+            return 0
+
+        # NO KEY: the details of the concurrent orders hold a KEY SHARE lock on the products
+        list(
+            self.filter(pk__in=deltas).select_for_update(no_key=True).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+        condition = Q()
+        for product_id, delta in deltas.items():
+            condition |= Q(pk=product_id, stock__gte=-delta) if delta < 0 else Q(pk=product_id)
+
+        updated = self.filter(condition).update(
+            stock=F('stock') + Case(
+                *(When(pk=product_id, then=Value(delta)) for product_id, delta in deltas.items()),
+                default=Value(0),
+                output_field=models.IntegerField(),
+            ),
+            modified=timezone.now(),
+        )
+        get_product_cache().invalidate(deltas, using=self.db)
+        return updated
+
+    def reserve(self, deltas: Dict[uuid.UUID, int], shards: Dict[uuid.UUID, int]) -> None:
+        """Apply the stock deltas of an order write, at the end of its transaction.
+
+        The products are locked in primary key order and updated with one conditional UPDATE
+        (``add_stock``), their row locks are held from there to the commit only. The stock taken
+        from a sharded product (with a number of shards in ``shards``) comes from its
+        ``StockShard`` counters. Raises ``InsufficientStockError`` when a product does not have
+        enough stock.
+        """
+        taken = {pk: -delta for pk, delta in deltas.items() if delta < 0 and shards.get(pk)}
+        plain = {pk: delta for pk, delta in deltas.items() if delta and pk not in taken}
+
+        if self.add_stock(plain) < len(plain):
+            stocks = dict(self.filter(pk__in=plain).values_list('pk', 'stock'))
+            missing = next((pk for pk in plain if pk not in stocks), None)
+            if missing is not None:
+                raise Product.DoesNotExist(f'product not found: {missing}')
+
+            pk = min(plain, key=lambda pk: stocks[pk] + plain[pk])  # the shortest of stock
+            raise InsufficientStockError(pk, stocks[pk])
+
+        for pk in sorted(taken):  # in primary key order, like the locks of the shards
+            StockShard.objects.using(self.db).take(pk, taken[pk])
+
+    def shard_stock(self, product_id: Any, shards: int, stock: Optional[int] = None) -> 'Product':
+        """Spread the stock of a product (``stock`` replaces it) evenly over ``shards`` counters,
+        zero shards gathers it back in the product.
+        """
+        with transaction.atomic(using=self.db):
+            product = self.select_for_update(no_key=True).get(pk=product_id)
+            rows = list(
+                StockShard.objects.using(self.db).select_for_update().filter(product=product)
+            )
+            if stock is None:
+                stock = product.stock + sum(row.stock for row in rows)
+
+            StockShard.objects.using(self.db).filter(pk__in=[row.pk for row in rows]).delete()
+            size, extra = divmod(stock, shards) if shards else (0, 0)
+            StockShard.objects.using(self.db).bulk_create(
+                StockShard(product=product, number=number, stock=size + (number < extra))
+                for number in range(shards)
+            )
+
+            product.stock = 0 if shards else stock
+            product.stock_shards = shards
+            product.save(using=self.db)
+
+        return product
 
 
 class Product(models.Model):
@@ -10,26 +130,433 @@ class Product(models.Model):
     name = models.TextField()
     price = MoneyField(max_digits=14, decimal_places=2, default_currency='ARS')
     stock = models.PositiveIntegerField()
+    # bumped by every write, including the bulk ones, it is the validator of the HTTP caching
+    modified = models.DateTimeField(auto_now=True)
+    # the stock of a flash-sale product is spread over this many counters (StockShard) that take
+    # the concurrent reservations instead of the product row, ``stock`` keeps what is not in them
+    stock_shards = models.PositiveSmallIntegerField(default=0)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(NAME_SEARCH_VECTOR, name='product_name_search_idx'),
+            # the orderings of the product list (keyset pagination)
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_id_idx'),
+            models.Index(fields=['stock', 'id'], name='product_stock_id_idx'),
+        ]
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        super().save(*args, **kwargs)
+        get_product_cache().invalidate([self.pk], using=self._state.db)
+
+    def delete(self, using: Any = None, keep_parents: bool = False) -> Tuple[int, Dict[str, int]]:
+        pk = self.pk
+        deleted = super().delete(using, keep_parents)
+        get_product_cache().invalidate([pk], using=using or self._state.db)
+        return deleted
+
+    def total_stock(self) -> int:
+        """The stock of the product and of its shards."""
+        if not self.stock_shards:
+            return self.stock
+
+        return self.stock + (self.stockshard_set.aggregate(stock=Sum('stock'))['stock'] or 0)
+
+
+class StockShardQuerySet(models.QuerySet):
+    def take(self, product_id: uuid.UUID, quantity: int) -> None:
+        """Take stock of a sharded product, in the transaction of the caller.
+
+        The stock is taken from a random shard that has enough of it and is not locked by a
+        concurrent order, with one UPDATE that waits for nothing. When there is none, the product
+        and all its shards are locked and the stock is taken from all of them.
+        """
+        shard = self.filter(product_id=product_id, stock__gte=quantity).select_for_update(
+            skip_locked=True
+        ).order_by('?').values('pk')[:1]
+
+        # a rolled back savepoint releases the lock that the subquery may keep on a shard it
+        # rechecked after a concurrent update and skipped
+        savepoint = transaction.savepoint(using=self.db)
+        if self.filter(pk=Subquery(shard)).update(stock=F('stock') - quantity):
+            transaction.savepoint_commit(savepoint, using=self.db)
+            return
+        transaction.savepoint_rollback(savepoint, using=self.db)
+
+        # NO KEY: the details of the concurrent orders hold a KEY SHARE lock on the product
+        product = Product.objects.using(self.db).select_for_update(no_key=True).get(pk=product_id)
+        rows = list(self.select_for_update().filter(product_id=product_id).order_by('number'))
+        available = product.stock + sum(row.stock for row in rows)
+        if available < quantity:
+            raise InsufficientStockError(product_id, available)
+
+        remaining = quantity
+        for row in rows:
+            taken = min(row.stock, remaining)
+            row.stock -= taken
+            remaining -= taken
+        self.bulk_update(rows, ['stock'])
+        Product.objects.using(self.db).add_stock({product_id: -remaining})
+
+
+class StockShard(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    number = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField()
+
+    objects = StockShardQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'number'], name='stock_shard_number_unique'),
+        ]
+
+
+def _total(lines: List['OrderDetail']) -> Decimal:
+    return sum((line.cuantity * line.price.amount for line in lines), Decimal(0))
+
+
+def _reserve(lines: List['OrderDetail'], using: str) -> None:
+    deltas: Dict[uuid.UUID, int] = {}
+    for line in lines:
+        deltas[line.product.pk] = deltas.get(line.product.pk, 0) - line.cuantity
+
+    Product.objects.using(using).reserve(
+        deltas, {line.product.pk: line.product.stock_shards for line in lines}
+    )
+
+
+@contextmanager
+def _count_stock_conflicts(operation: str) -> Iterator[None]:
+    try:
+        yield
+    except InsufficientStockError:
+        STOCK_CONFLICTS.labels(operation).inc()
+        raise
+
+
+class OrderQuerySet(models.QuerySet):
+    def register(self, order_data: List[Tuple[int, str]]) -> 'Order':
+        """Create an order reserving the stock of every product in a constant number of queries.
+
+        The products are not locked, their stock is reserved by conditional updates after the
+        order is written (``ProductQuerySet.reserve``), so the concurrent orders of a product only
+        wait for each other from that update to the commit. Raises ``Product.DoesNotExist`` or
+        ``InsufficientStockError``, nothing is written then.
+        """
+        with _count_stock_conflicts('register'):
+            products = self._products([order_data])
+            lines = self._lines(order_data, products, {pk: p.stock for pk, p in products.items()})
+
+            with transaction.atomic(using=self.db):
+                order = self.create(total=_total(lines))
+                for line in lines:
+                    line.order = order
+                OrderDetail.objects.using(self.db).bulk_create(lines)
+
+                _reserve(lines, self.db)
+
+        return order
+
+    def register_many(self, orders_data: List[List[Tuple[int, str]]]) -> List[Any]:
+        """Create many orders in a constant number of queries, return the order or the error
+        (``Product.DoesNotExist``, ``InsufficientStockError`` or ``DatabaseError``) of each one.
+
+        The orders are checked one after the other against the stock read once, then those that
+        fit are created together and their stock is reserved by one conditional update. When it
+        fails (concurrent orders took the stock meanwhile) they are registered one by one.
+        """
+        products = self._products(orders_data)
+        available = {pk: product.stock for pk, product in products.items()}
+
+        results: List[Any] = []
+        for order_data in orders_data:
+            try:
+                results.append(self._lines(order_data, products, available))
+            except (Product.DoesNotExist, InsufficientStockError) as error:
+                if isinstance(error, InsufficientStockError):
+                    STOCK_CONFLICTS.labels('register').inc()
+                results.append(error)
+
+        fitting = [number for number, result in enumerate(results) if isinstance(result, list)]
+        try:
+            with transaction.atomic(using=self.db):
+                orders = self.bulk_create(Order(total=_total(results[n])) for n in fitting)
+                for order, number in zip(orders, fitting):
+                    for line in results[number]:
+                        line.order = order
+                lines = [line for number in fitting for line in results[number]]
+                OrderDetail.objects.using(self.db).bulk_create(lines)
+
+                _reserve(lines, self.db)
+        except (Product.DoesNotExist, InsufficientStockError, DatabaseError):
+            for number in fitting:
+                try:
+                    with transaction.atomic(using=self.db):
+                        results[number] = self.register(orders_data[number])
+                except (Product.DoesNotExist, InsufficientStockError, DatabaseError) as error:
+                    results[number] = error
+        else:
+            for order, number in zip(orders, fitting):
+                results[number] = order
+
+        return results
+
+    @staticmethod
+    def _lines(
+        order_data: List[Tuple[int, str]],
+        products: Dict[uuid.UUID, 'Product'],
+        available: Dict[uuid.UUID, int],
+    ) -> List['OrderDetail']:
+        """Details of an order, the stock of its products is taken from ``available``."""
+        taken: Dict[uuid.UUID, int] = {}
+        lines = []
+        for cuantity, product_id in order_data:
+            product = products.get(product_key(product_id))  # type: ignore
+            if product is None:
+                raise Product.DoesNotExist(f'product not found: {product_id}')
+
+            left = available[product.pk] - taken.get(product.pk, 0)
+            if not product.stock_shards and left < cuantity:  # checked again on update
+                raise InsufficientStockError(product_id, left)
+
+            taken[product.pk] = taken.get(product.pk, 0) + cuantity
+            lines.append(OrderDetail(cuantity=cuantity, product=product, price=product.price))
+
+        for pk, cuantity in taken.items():
+            available[pk] -= cuantity
+        return lines
+
+    def _products(self, orders_data: List[List[Tuple[int, str]]]) -> Dict[uuid.UUID, 'Product']:
+        return Product.objects.using(self.db).in_bulk({
+            key
+            for order_data in orders_data
+            for key in (product_key(product_id) for _, product_id in order_data) if key
+        })
+
+    def restore_stock(self) -> List[uuid.UUID]:
+        """Give back the stock reserved by the orders and return the ids of the products.
+
+        The stock of every product is restored with one aggregated UPDATE statement.
+        """
+        details = OrderDetail.objects.using(self.db).filter(order__in=self)
+        with transaction.atomic(using=self.db):
+            # the orders are locked before the products, like in ``Order.update_details``
+            list(self.select_for_update().order_by('pk').values_list('pk', flat=True))
+            # NO KEY: the details of the concurrent orders hold a KEY SHARE lock on the products
+            product_ids = list(
+                Product.objects.using(self.db).select_for_update(no_key=True)
+                .filter(pk__in=details.values('product_id'))
+                .order_by('pk')
+                .values_list('pk', flat=True)
+            )
+            if not product_ids:
+                return product_ids
+
+            restored = (
+                details.order_by().values('product_id').annotate(restored=Sum('cuantity'))
+                .values_list('product_id', 'restored')
+            )
+            sql, params = restored.query.get_compiler(using=self.db).as_sql()
+
+            connection = connections[self.db]
+            table = connection.ops.quote_name(Product._meta.db_table)
+            pk_column = connection.ops.quote_name(Product._meta.pk.column)
+            stock_column = connection.ops.quote_name(Product._meta.get_field('stock').column)
+            modified_column = connection.ops.quote_name(
+                Product._meta.get_field('modified').column
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET {stock_column} = {table}.{stock_column} + sub.restored, '
+                    f'{modified_column} = %s '
+                    f'FROM ({sql}) AS sub WHERE {table}.{pk_column} = sub.product_id',
+                    [timezone.now(), *params]
+                )
+            get_product_cache().invalidate(product_ids, using=self.db)
+
+        return product_ids
+
+    def delete(self) -> Tuple[int, Dict[str, int]]:
+        with transaction.atomic(using=self.db):
+            self.restore_stock()
+            return super().delete()
 
 
 class Order(models.Model):
     date_time = models.DateTimeField(auto_now=True)
+    total = MoneyField(max_digits=14, decimal_places=2, default=0, default_currency='ARS')
+
+    objects = OrderQuerySet.as_manager()
 
     class Meta:
         ordering = ['date_time']
+        indexes = [
+            models.Index(fields=['date_time', 'id'], name='order_date_time_id_idx'),
+        ]
 
-    def delete(self, using: Any = None, keep_parents: bool = False) -> Tuple[int, Dict[str, int]]:
-        with transaction.atomic():
-            for order_detail in self.orderdetail_set.all():
-                order_detail.product.stock += order_detail.cuantity
-                order_detail.product.save()
+    def update_details(self, order_data: List[Tuple[int, str]]) -> None:
+        """Set the cuantity of each product of the order in a constant number of queries.
+
+        Products that are not in the order yet are added, a cuantity of zero removes the product
+        from the order and the details that are not mentioned are kept.
+        """
+        with _count_stock_conflicts('update'), transaction.atomic():
+            # the lock on the order serializes the changes of its details and its total
+            self.total = Order.objects.select_for_update().get(pk=self.pk).total
+
+            details = {detail.product_id: detail for detail in self.orderdetail_set.all()}
+            products = Product.objects.in_bulk(
+                set(details) | {key for key in (product_key(p) for _, p in order_data) if key}
+            )
 
-                order_detail.delete()
+            deltas, changes = self._diff_details(order_data, details, products)
+            # a product keeps the price it was added to the order with, a new one is added with
+            # its current price
+            prices = {
+                detail.product_id: detail.price
+                for detail in (*details.values(), *changes['create'])
+            }
+            self.total = Money(
+                self.total.amount - sum(
+                    (delta * prices[pk].amount for pk, delta in deltas.items() if delta),
+                    Decimal(0)
+                ),
+                self.total.currency
+            )
 
-        return super().delete(using, keep_parents)
+            OrderDetail.objects.bulk_update(changes['update'], ['cuantity'])
+            OrderDetail.objects.bulk_create(changes['create'])
+            OrderDetail.objects.filter(pk__in=[d.pk for d in changes['delete']]).delete()
+            self.save()
+
+            Product.objects.reserve(deltas, {pk: products[pk].stock_shards for pk in deltas})
+
+    def _diff_details(
+        self,
+        order_data: List[Tuple[int, str]],
+        details: Dict[uuid.UUID, 'OrderDetail'],
+        products: Dict[uuid.UUID, Product],
+    ) -> Tuple[Dict[uuid.UUID, int], Dict[str, List['OrderDetail']]]:
+        deltas: Dict[uuid.UUID, int] = {}
+        changes: Dict[str, Dict[uuid.UUID, OrderDetail]] = {
+            'update': {}, 'create': {}, 'delete': {}
+        }
+        for cuantity, product_id in order_data:
+            key = product_key(product_id)
+            product = products.get(key)  # type: ignore
+            if product is None:
+                raise Product.DoesNotExist(f'product not found: {product_id}')
+
+            detail = details.get(product.pk)
+            current = detail.cuantity if detail else 0
+            if not product.stock_shards and product.stock + current < cuantity:
+                raise InsufficientStockError(product_id, product.stock + current)
+
+            deltas[product.pk] = current - cuantity
+            for change in changes.values():  # the last occurrence of a product wins
+                change.pop(product.pk, None)
+
+            if detail is None:
+                if cuantity:
+                    changes['create'][product.pk] = OrderDetail(
+                        order=self, cuantity=cuantity, product=product, price=product.price
+                    )
+            else:
+                detail.cuantity = cuantity
+                changes['update' if cuantity else 'delete'][product.pk] = detail
+
+        return deltas, {name: list(change.values()) for name, change in changes.items()}
+
+    def delete(self, using: Any = None, keep_parents: bool = False) -> Tuple[int, Dict[str, int]]:
+        with transaction.atomic(using=using):
+            Order.objects.db_manager(using).filter(pk=self.pk).restore_stock()
+            return super().delete(using, keep_parents)
 
 
 class OrderDetail(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE)
     cuantity = models.PositiveIntegerField()
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    # the unit price of the product when it was added to the order, the total of the order is the
+    # sum of its cuantities at these prices (the later price changes do not apply to it)
+    price = MoneyField(max_digits=14, decimal_places=2, default_currency='ARS')
+
+
+class OrderRequestQuerySet(models.QuerySet):
+    def process(self, size: int, max_attempts: int) -> List['OrderRequest']:
+        """Register the orders of up to ``size`` pending requests, in arrival order, in one
+        transaction (``OrderQuerySet.register_many``) and return the requests.
+
+        The requests claimed by other workers are skipped. An order without stock or with unknown
+        products is rejected alone, one that failed with a database error (e.g. a deadlock with a
+        concurrent order) stays pending for the next batch and is rejected after ``max_attempts``.
+        """
+        with transaction.atomic(using=self.db):
+            requests = list(
+                self.select_for_update(skip_locked=True)
+                .filter(status=OrderRequest.PENDING).order_by('pk')[:size]
+            )
+            results = Order.objects.using(self.db).register_many([
+                [(line['cuantity'], line['product']) for line in order_request.products]
+                for order_request in requests
+            ])
+
+            for order_request, result in zip(requests, results):
+                order_request.attempts += 1
+                if isinstance(result, Order):
+                    order_request.order = result
+                    order_request.status = OrderRequest.ACCEPTED
+                    order_request.processed = timezone.now()
+                elif not isinstance(result, DatabaseError):
+                    order_request.reject(str(result))
+                elif order_request.attempts >= max_attempts:
+                    order_request.reject(f'the order could not be registered: {result}')
+
+            self.bulk_update(requests, ['status', 'order', 'message', 'attempts', 'processed'])
+
+        return requests
+
+
+class OrderRequest(models.Model):
+    """An order queued by ``enqueue_order``, registered by a ``process_order_requests`` worker."""
+
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+
+    status = models.CharField(
+        max_length=8,
+        choices=[(PENDING, 'Pending'), (ACCEPTED, 'Accepted'), (REJECTED, 'Rejected')],
+        default=PENDING
+    )
+    # the validated ApiProductsOrderSerializer products
+    products = models.JSONField()
+    order = models.OneToOneField(Order, null=True, blank=True, on_delete=models.SET_NULL)
+    message = models.TextField(blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    processed = models.DateTimeField(null=True, blank=True)
+
+    objects = OrderRequestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # the queue, the workers read it in primary key order
+            models.Index(
+                fields=['id'], name='order_request_pending_idx', condition=Q(status='pending')
+            ),
+        ]
+
+    def reject(self, message: str) -> None:
+        self.status = OrderRequest.REJECTED
+        self.message = message
+        self.processed = timezone.now()
+
+
+class RevokedToken(models.Model):
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
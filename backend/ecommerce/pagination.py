@@ -0,0 +1,169 @@
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Expression, F, QuerySet, Value
+from djmoney.money import Money
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.request import Request
+
+from service import settings
+
+
+class RowComparison(Expression):  # pylint: disable=abstract-method
+    """``(field, ...) > (value, ...)`` (or another operator), a range of a multicolumn index."""
+
+    conditional = True
+
+    def __init__(self, fields: Sequence[str], operator: str, values: Sequence[Any]) -> None:
+        super().__init__(output_field=BooleanField())
+        self.operator = operator
+        self.fields = [F(name) for name in fields]
+        self.values = [Value(value) for value in values]
+
+    def get_source_expressions(self) -> List[Any]:
+        return [*self.fields, *self.values]
+
+    def set_source_expressions(self, exprs: List[Any]) -> None:
+        self.fields, self.values = exprs[:len(self.fields)], exprs[len(self.fields):]
+
+    def as_sql(self, compiler: Any, connection: Any) -> Tuple[str, List[Any]]:
+        # pylint: disable=arguments-differ
+        fields = [compiler.compile(field) for field in self.fields]
+        values = [compiler.compile(value) for value in self.values]
+        return (
+            f'({", ".join(sql for sql, _ in fields)}) {self.operator} '
+            f'({", ".join(sql for sql, _ in values)})',
+            [param for _, params in (*fields, *values) for param in params]
+        )
+
+
+def after(queryset: QuerySet, ordering: Sequence[str], position: Sequence[Any]) -> QuerySet:
+    """Filter the rows that follow ``position`` (the values of the ``ordering`` fields) in that
+    ordering, all its fields must have the same direction.
+    """
+    fields = [name.lstrip('-') for name in ordering]
+    return queryset.filter(
+        RowComparison(fields, '<' if ordering[0].startswith('-') else '>', position)
+    )
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination, every page is fetched with an indexed range query and no COUNT(*).
+
+    The position in the cursor has the values of all the ordering fields, the last one is unique
+    (the primary key), so the pages never repeat or skip rows that share the value of the first
+    one and no OFFSET is ever needed.
+    """
+
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+
+    def __init__(self) -> None:
+        self.base_url: Optional[str] = None
+        # the positions of the links of the paginated page, None when it has no such link
+        self._next_position: Optional[str] = None
+        self._previous_position: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self._next_position is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self._previous_position is not None
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> Optional[List[Any]]:
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request)
+        reverse = cursor.reverse if cursor else False
+        position = cursor.position if cursor else None
+
+        ordering = [_reversed(name) for name in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = after(queryset, ordering, self._decode_position(queryset, position))
+
+        results = list(queryset[:self.page_size + 1])
+        page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            page.reverse()
+
+        has_next = position is not None if reverse else has_following
+        has_previous = has_following if reverse else position is not None
+        self._next_position = (
+            (self._get_position_from_instance(page[-1], self.ordering) if page else position)
+            if has_next else None
+        )
+        self._previous_position = (
+            (self._get_position_from_instance(page[0], self.ordering) if page else position)
+            if has_previous else None
+        )
+        if (has_previous or has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return page
+
+    def get_next_link(self) -> Optional[str]:
+        if self._next_position is None:
+            return None
+
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._next_position))
+
+    def get_previous_link(self) -> Optional[str]:
+        if self._previous_position is None:
+            return None
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self._previous_position)
+        )
+
+    def _get_position_from_instance(self, instance: Any, ordering: List[str]) -> str:
+        values = []
+        for name in ordering:
+            field_name = name.lstrip('-')
+            attr = instance[field_name] if isinstance(instance, dict) else getattr(
+                instance, field_name
+            )
+            values.append(str(attr.amount if isinstance(attr, Money) else attr))
+
+        return json.dumps(values)
+
+    def _decode_position(self, queryset: QuerySet, position: str) -> List[Any]:
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(position)
+
+            return [
+                queryset.model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (ValueError, ValidationError) as error:
+            raise NotFound(self.invalid_cursor_message) from error
+
+
+def _reversed(name: str) -> str:
+    return name[1:] if name.startswith('-') else f'-{name}'
+
+
+class ProductPagination(KeysetPagination):
+    ordering = ('id',)
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ('date_time', 'id')
+
+
+class OrderDetailPagination(KeysetPagination):
+    ordering = ('id',)
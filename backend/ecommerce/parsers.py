@@ -0,0 +1,83 @@
+import codecs
+import csv
+import json
+from abc import ABC, abstractmethod
+from typing import IO, Any, Dict, Iterable, Iterator, Mapping, Optional
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from ecommerce.renderers import JsonRenderer
+
+
+def iter_csv(lines: Iterable[bytes], encoding: str = 'utf-8') -> Iterator[Dict[str, str]]:
+    """Yield a dict per CSV row, the first row names the columns and empty values are skipped."""
+    for record in csv.DictReader(codecs.iterdecode(lines, encoding)):
+        yield {key: value for key, value in record.items() if key and value not in ('', None)}
+
+
+def iter_ndjson(lines: Iterable[bytes], encoding: str = 'utf-8') -> Iterator[Any]:
+    """Yield a value per JSON line, lines that are not valid JSON are yielded as text."""
+    for line in codecs.iterdecode(lines, encoding):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield line
+
+
+class StreamParser(BaseParser, ABC):
+    """Parse the request body lazily, ``request.data`` is an iterator of records."""
+
+    @abstractmethod
+    def iter_records(self, lines: Iterable[bytes], encoding: str) -> Iterator[Any]:
+        """Yield the records of the lines of the body."""
+
+    def parse(
+        self,
+        stream: Optional[IO[bytes]],
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None
+    ) -> Iterator[Any]:
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if stream is None:
+            return iter(())
+
+        return self.iter_records(iter(stream.readline, b''), encoding)
+
+
+class CsvParser(StreamParser):
+    media_type = 'text/csv'
+
+    def iter_records(self, lines: Iterable[bytes], encoding: str) -> Iterator[Any]:
+        return iter_csv(lines, encoding)
+
+
+class NdjsonParser(StreamParser):
+    media_type = 'application/x-ndjson'
+
+    def iter_records(self, lines: Iterable[bytes], encoding: str) -> Iterator[Any]:
+        return iter_ndjson(lines, encoding)
+
+
+class JsonParser(JSONParser):
+    """``JSONParser`` that decodes the UTF-8 bodies with orjson."""
+
+    renderer_class = JsonRenderer
+
+    def parse(
+        self,
+        stream: Optional[IO[bytes]],
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None
+    ) -> Any:
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if stream is None or not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as error:
+            raise ParseError(f'JSON parse error - {error}') from error
@@ -0,0 +1,50 @@
+from typing import Any, Mapping, Optional
+
+import orjson
+from djmoney.money import Money
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+
+_encoder = JSONEncoder()
+
+# the datetimes are left to the DRF encoder, it formats them like the DRF renderer
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Money):  # rendered like its amount
+        obj = obj.amount
+
+    return _encoder.default(obj)
+
+
+class JsonRenderer(renderers.JSONRenderer):
+    """``JSONRenderer`` that encodes with orjson, the output is the same.
+
+    orjson encodes the built-in types, the UUIDs and the subclasses of dict and list (the
+    serializer data), the DRF encoder the rest (``Decimal``, ``Money``, datetimes, lazy strings,
+    ...). The indented output (browsable API) and the integers over 64 bits are rendered by
+    ``JSONRenderer``. Unlike it, the NaN and infinite floats are rendered as null.
+    """
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None
+    ) -> bytes:
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escaped like JSONRenderer does, JSON must be a strict JavaScript subset
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
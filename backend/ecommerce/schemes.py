@@ -1,4 +1,5 @@
-from typing import Any, Dict, List
+import copy
+from typing import Any, Dict, List, Tuple
 
 import yaml
 from rest_framework.schemas.openapi import AutoSchema
@@ -6,6 +7,89 @@ from rest_framework.schemas.openapi import AutoSchema
 from service.views import ApiVersioning
 
 
+# request bodies of the custom actions, parsed once
+_PRODUCTS_ORDER_BODY = yaml.safe_load('''
+    required: true
+    content:
+        application/json:
+            schema:
+                type: object
+                properties:
+                    products:
+                        type: array
+                        items:
+                            type: object
+                            properties:
+                                cuantity:
+                                    type: integer
+                                product:
+                                    type: string
+                            required:
+                                - cuantity
+                                - product
+                required:
+                    - products
+''')
+
+_ORDERS_BODY = yaml.safe_load('''
+    required: true
+    content:
+        application/json:
+            schema:
+                type: object
+                properties:
+                    orders:
+                        type: array
+                        items:
+                            type: integer
+                required:
+                    - orders
+''')
+
+_TOTALS_BODY = yaml.safe_load('''
+    required: true
+    content:
+        application/json:
+            schema:
+                type: object
+                properties:
+                    orders:
+                        type: array
+                        items:
+                            type: integer
+                    date_from:
+                        type: string
+                        format: date-time
+                    date_to:
+                        type: string
+                        format: date-time
+                    usd:
+                        type: boolean
+''')
+
+_IDEMPOTENCY_KEY_PARAMETER = yaml.safe_load('''
+    name: Idempotency-Key
+    in: header
+    required: false
+    description: the response to the first request with the key is replayed to its retries
+    schema:
+        type: string
+        maxLength: 255
+''')
+
+_REQUEST_BODIES: Dict[Tuple[str, str], Dict[str, Any]] = {
+    ('POST', 'register_order/'): _PRODUCTS_ORDER_BODY,
+    ('POST', 'enqueue_order/'): _PRODUCTS_ORDER_BODY,
+    ('PUT', 'update_order/'): _PRODUCTS_ORDER_BODY,
+    ('POST', 'cancel_orders/'): _ORDERS_BODY,
+    ('POST', 'get_totals/'): _TOTALS_BODY,
+}
+
+_IDEMPOTENT_ACTIONS = [
+    ('POST', 'register_order/'), ('POST', 'enqueue_order/'), ('PUT', 'update_order/')
+]
+
+
 class ApiVersioningSchema(AutoSchema):
     def get_path_parameters(self, path: str, method: str) -> List[Dict[str, Any]]:
         parameters = super().get_path_parameters(path, method)
@@ -19,52 +103,13 @@ class ApiVersioningSchema(AutoSchema):
 class CustomOrderSchema(ApiVersioningSchema):
     def get_operation(self, path: str, method: str) -> Dict[str, Any]:
         operation = super().get_operation(path, method)
-        if method == 'POST' and path.endswith('register_order/'):
-            operation['requestBody'] = yaml.safe_load('''
-                required: true
-                content:
-                    application/json:
-                        schema:
-                            type: object
-                            properties:
-                                products:
-                                    type: array
-                                    items:
-                                        type: object
-                                        properties:
-                                            cuantity:
-                                                type: integer
-                                            product:
-                                                type: string
-                                        required:
-                                            - cuantity
-                                            - product
-                            required:
-                                - products
-                ''')
-
-        elif method == 'PUT' and path.endswith('update_order/'):
-            operation['requestBody'] = yaml.safe_load('''
-                required: true
-                content:
-                    application/json:
-                        schema:
-                            type: object
-                            properties:
-                                products:
-                                    type: array
-                                    items:
-                                        type: object
-                                        properties:
-                                            cuantity:
-                                                type: integer
-                                            product:
-                                                type: string
-                                        required:
-                                            - cuantity
-                                            - product
-                            required:
-                                - products
-                ''')
+        for (body_method, action), body in _REQUEST_BODIES.items():
+            if method == body_method and path.endswith(action):
+                # the operations must not share the same instance
+                operation['requestBody'] = copy.deepcopy(body)
+
+        for action_method, action in _IDEMPOTENT_ACTIONS:
+            if method == action_method and path.endswith(action):
+                operation['parameters'].append(copy.deepcopy(_IDEMPOTENCY_KEY_PARAMETER))
 
         return operation
@@ -1,25 +1,64 @@
+from typing import Any, Dict
+
+from django.db import transaction
 from djmoney.contrib.django_rest_framework import MoneyField
 from rest_framework import serializers
 
-from ecommerce.models import Order, OrderDetail, Product
+from ecommerce.models import Order, OrderDetail, OrderRequest, Product
+from service import settings
 
 
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ['modified', 'stock_shards']
+
+    def to_representation(self, instance: Product) -> Dict[str, Any]:
+        data = super().to_representation(instance)
+        if instance.stock_shards:
+            data['stock'] = instance.total_stock()
+
+        return data
+
+    def update(self, instance: Product, validated_data: Dict[str, Any]) -> Product:
+        stock = validated_data.pop('stock', None) if instance.stock_shards else None
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if stock is not None:  # spread over the shards of the product
+                instance = Product.objects.shard_stock(instance.pk, instance.stock_shards, stock)
+
+        return instance
+
+
+class ProductImportSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    id = serializers.UUIDField(required=False)
+    name = serializers.CharField()
+    price = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0)
+    price_currency = serializers.ChoiceField(choices=settings.CURRENCIES, default='ARS')
+    stock = serializers.IntegerField(min_value=0, max_value=2147483647)
 
 
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
-        fields = '__all__'
+        exclude = ['total', 'total_currency']
 
 
 class OrderDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderDetail
         fields = '__all__'
+        read_only_fields = ['price', 'price_currency']
+
+    def create(self, validated_data: Dict[str, Any]) -> OrderDetail:
+        validated_data['price'] = validated_data['product'].price
+        return super().create(validated_data)
+
+
+class OrderRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderRequest
+        exclude = ['attempts']
 
 
 class ApiOrderSerializer(serializers.Serializer):  # pylint: disable=abstract-method
@@ -31,5 +70,50 @@ class ApiProductsOrderSerializer(serializers.Serializer):  # pylint: disable=abs
     products = ApiOrderSerializer(many=True, required=True)
 
 
+class ApiOrdersSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    orders = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=True, allow_empty=False
+    )
+
+
+class ApiProductQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    search = serializers.CharField(required=False, max_length=200)
+    price_min = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    price_max = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    price_currency = serializers.ChoiceField(choices=settings.CURRENCIES, required=False)
+    stock_min = serializers.IntegerField(min_value=0, required=False)
+    stock_max = serializers.IntegerField(min_value=0, required=False)
+
+
 class ApiTotalMoneySerializer(serializers.Serializer):  # pylint: disable=abstract-method
     total = MoneyField(max_digits=14, decimal_places=2)
+
+
+class ApiTotalsQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    orders = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=settings.ORDER_TOTALS_LIMIT
+    )
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    usd = serializers.BooleanField(default=False)
+
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        if not {'orders', 'date_from', 'date_to'} & set(attrs):
+            raise serializers.ValidationError('a list of orders or a date range is required')
+
+        return attrs
+
+
+class ApiOrderTotalSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    order = serializers.IntegerField()
+    total = MoneyField(max_digits=14, decimal_places=2)
+    total_usd = MoneyField(max_digits=14, decimal_places=2, required=False)
+
+
+class ApiExportQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    date_from = serializers.DateTimeField(required=False)
+    date_to = serializers.DateTimeField(required=False)
+    output = serializers.ChoiceField(choices=['ndjson', 'csv'], default='ndjson')
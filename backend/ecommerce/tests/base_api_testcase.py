@@ -1,13 +1,16 @@
 from abc import ABC
 from typing import Any, Dict, Union
 
+from django.conf import settings
 from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from ecommerce.cache import get_product_cache
 
-class BaseApiTestCase(ABC, TestCase):
+
+class ApiTestMixin(ABC):
     _DEFAULT_API_CREDS = 'testing_api'
     _DEFAULT_API_EMAIL = 'test@test.com'
     _DEFAULT_API_FIRST_NAME = 'Testing'
@@ -15,6 +18,7 @@ class BaseApiTestCase(ABC, TestCase):
 
     def setUp(self) -> None:
         self.api_version = 'v1'
+        get_product_cache().clear()
 
         user = User(
             email=self._DEFAULT_API_EMAIL,
@@ -35,6 +39,19 @@ class BaseApiTestCase(ABC, TestCase):
         )
 
         self.access_token = response.json()['access']
+        self.refresh_token = response.json()['refresh']
+
+    def assertQueryBudget(self, response: Any) -> None:  # pylint: disable=invalid-name
+        """Fail if the request ran more queries than the ``QUERY_BUDGETS`` entry of its view."""
+        budget = settings.QUERY_BUDGETS.get(response.view_name)
+        self.assertIsNotNone(budget, f'{response.view_name} has no query budget')  # type: ignore
+
+        stats = response.query_stats
+        self.assertLessEqual(  # type: ignore
+            stats.count,
+            budget,
+            f'{response.view_name} ran {stats.count} queries, its budget is {budget}'
+        )
 
     def _create_product(self, **kwargs: Union[str, int]) -> Dict[str, Any]:
         client = APIClient()
@@ -48,3 +65,11 @@ class BaseApiTestCase(ABC, TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         return response.json()
+
+
+class BaseApiTestCase(ApiTestMixin, TestCase):
+    pass
+
+
+class BaseApiTransactionTestCase(ApiTestMixin, TransactionTestCase):
+    """For the code that uses the database from other threads, it must see the committed data."""
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from decimal import Decimal
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.exchange import DolarBlueProvider
+from ecommerce.tests.base_api_testcase import BaseApiTransactionTestCase
+from ecommerce.tests.tests_exchange import StubExchangeServer
+
+
+class AsyncViewsTestCase(BaseApiTransactionTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        self.server = StubExchangeServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            EXCHANGE_RATE={
+                'PROVIDER': 'ecommerce.exchange.DolarBlueProvider',
+                'OPTIONS': {'url': self.server.url, 'timeout': 1},
+            }
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def test_product_detail(self) -> None:
+        product = self._create_product(name='product 1', price='250', stock=10)
+
+        response = self.client.get(f'/api/{self.api_version}/async/product/{product["id"]}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.json(), product)
+
+    def test_register_order_total_usd(self) -> None:
+        product_id = self._create_product(name='product 1', price='250', stock=10)['id']
+
+        response = self.client.post(
+            f'/api/{self.api_version}/async/order/register_order/',
+            {'products': [{'cuantity': 8, 'product': product_id}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order_id = response.json()['id']
+
+        response = self.client.post(
+            f'/api/{self.api_version}/async/order/{order_id}/get_total_usd/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.json()['total']), Decimal('2'))
+
+    def test_insufficient_stock(self) -> None:
+        product_id = self._create_product(name='product 1', price='250', stock=1)['id']
+
+        response = self.client.post(
+            f'/api/{self.api_version}/async/order/register_order/',
+            {'products': [{'cuantity': 8, 'product': product_id}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_authenticated(self) -> None:
+        response = APIClient().get(f'/api/{self.api_version}/async/order/1/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response)
+
+    def test_not_found(self) -> None:
+        response = self.client.get(f'/api/{self.api_version}/async/order/1/')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_single_flight(self) -> None:
+        self.server.delay = 0.2
+        provider = DolarBlueProvider(self.server.url)
+
+        async def get_rates() -> list:
+            return await asyncio.gather(*(provider.aget_rate() for _ in range(50)))
+
+        self.assertListEqual(asyncio.run(get_rates()), [Decimal('1000.00')] * 50)
+        self.assertEqual(self.server.hits, 1)
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.models import RevokedToken
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+from service import authentication, settings
+from service.revocation import TokenDenylist
+
+
+class CachedAuthenticationTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        authentication.clear_caches()
+        self.product_id = self._create_product(name='test 1', price='10', stock=1)['id']
+
+    def _get_product(self, expected_code: int) -> int:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/{self.api_version}/product/{self.product_id}/')
+
+        self.assertEqual(response.status_code, expected_code)
+        return sum('auth_user' in query['sql'] for query in context.captured_queries)
+
+    def test_cached_user(self) -> None:
+        authentication.clear_caches()
+
+        self.assertEqual(self._get_product(status.HTTP_200_OK), 1)
+        self.assertEqual(self._get_product(status.HTTP_200_OK), 0)
+
+    def test_deactivated_user(self) -> None:
+        self._get_product(status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self._get_product(status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_changed_without_signal(self) -> None:
+        self._get_product(status.HTTP_200_OK)
+
+        # e.g. by another process or by a bulk update
+        type(self.user).objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self._get_product(status.HTTP_200_OK), 0)
+
+        authentication.invalidate_user(self.user.pk)
+        self._get_product(status.HTTP_401_UNAUTHORIZED)
+
+    def test_stateless(self) -> None:
+        authentication.clear_caches()
+
+        with override_settings(
+            JWT_AUTHENTICATION_CACHE={**settings.JWT_AUTHENTICATION_CACHE, 'STATELESS': True}
+        ):
+            self.assertEqual(self._get_product(status.HTTP_200_OK), 0)
+
+    def test_invalid_token(self) -> None:
+        self.access_token += 'invalid'
+
+        self._get_product(status.HTTP_401_UNAUTHORIZED)
+
+    def _revoke(self, **data: str) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post('/api/token/revoke/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_revoke_access_token(self) -> None:
+        self._get_product(status.HTTP_200_OK)
+
+        self._revoke()
+
+        self._get_product(status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke_refresh_token(self) -> None:
+        self._revoke(refresh=self.refresh_token)
+
+        response = APIClient().post(
+            '/api/token/refresh/', {'refresh': self.refresh_token}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_incremental_refresh(self) -> None:
+        denylist = TokenDenylist(refresh_interval=60, overlap=60)
+        denylist.refresh()
+        self.assertFalse(denylist.is_revoked('revoked'))
+
+        # revoked by another process
+        RevokedToken.objects.create(jti='revoked', expires_at=timezone.now() + timedelta(hours=1))
+        RevokedToken.objects.create(jti='expired', expires_at=timezone.now() - timedelta(hours=1))
+
+        with CaptureQueriesContext(connection) as context:
+            denylist.refresh()
+        self.assertIn('"revoked_at" >=', context.captured_queries[0]['sql'])
+
+        # checked without queries, the refreshes run in the background
+        with CaptureQueriesContext(connection) as context:
+            self.assertTrue(denylist.is_revoked('revoked'))
+            self.assertFalse(denylist.is_revoked('expired'))
+        self.assertEqual(len(context), 0)
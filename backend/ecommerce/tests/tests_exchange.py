@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from django.test import override_settings
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.exceptions import ExchangeRateError
+from ecommerce.exchange import DolarBlueProvider, get_exchange_rate_provider
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+
+
+def _fetches(outcome: str) -> float:
+    return REGISTRY.get_sample_value('exchange_rate_fetches_total', {'outcome': outcome}) or 0
+
+
+class StubExchangeServer(ThreadingHTTPServer):
+    """Local replacement of the exchange rate service."""
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), StubExchangeHandler)
+
+        self.hits = 0
+        self.delay = 0.0
+        self.status = 200
+        self.data: List[Dict[str, Any]] = [
+            {'casa': {'nombre': 'Dolar Oficial', 'venta': '105,50'}},
+            {'casa': {'nombre': 'Dolar Blue', 'venta': '1.000,00'}},
+        ]
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+
+class StubExchangeHandler(BaseHTTPRequestHandler):
+    server: StubExchangeServer
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+
+        body = json.dumps(self.server.data).encode()
+        self.send_response(self.server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:  # pylint: disable=arguments-differ
+        pass
+
+
+class ExchangeTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        self.server = StubExchangeServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            EXCHANGE_RATE={
+                'PROVIDER': 'ecommerce.exchange.DolarBlueProvider',
+                'OPTIONS': {'url': self.server.url, 'timeout': 1, 'failure_threshold': 2},
+            }
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _get_total_usd(self, expected_code: int) -> Dict[str, Any]:
+        product_id = self._create_product(name='product 1', price='250', stock=10)['id']
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(
+            f'/api/{self.api_version}/order/register_order/',
+            {'products': [{'cuantity': 8, 'product': product_id}]},
+            format='json'
+        )
+        order_id = response.json()['id']
+
+        response = client.post(f'/api/{self.api_version}/order/{order_id}/get_total_usd/')
+
+        self.assertEqual(response.status_code, expected_code)
+        return response.json()
+
+    def test_get_total_usd(self) -> None:
+        resp_data = self._get_total_usd(status.HTTP_200_OK)
+        self.assertEqual(Decimal(resp_data['total']), Decimal('2'))
+
+        # the rate is cached
+        self._get_total_usd(status.HTTP_200_OK)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_get_totals_usd(self) -> None:
+        self._get_total_usd(status.HTTP_200_OK)
+        self._get_total_usd(status.HTTP_200_OK)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(
+            f'/api/{self.api_version}/order/get_totals/',
+            {'date_from': '2000-01-01T00:00:00Z', 'usd': True},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        totals = response.json()['totals']
+        self.assertEqual(len(totals), 2)
+        for total in totals:
+            self.assertEqual(Decimal(total['total']), Decimal('2000'))
+            self.assertEqual(Decimal(total['total_usd']), Decimal('2'))
+
+    def test_get_total_usd_upstream_error(self) -> None:
+        self.server.status = 503
+
+        resp_data = self._get_total_usd(status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertDictEqual(resp_data, {'message': 'error generating the result'})
+
+    def test_circuit_breaker(self) -> None:
+        self.server.status = 503
+        provider = get_exchange_rate_provider()
+        errors, rejected = _fetches('error'), _fetches('circuit_open')
+
+        for _ in range(5):
+            with self.assertRaises(ExchangeRateError):
+                provider.get_rate()
+
+        self.assertEqual(self.server.hits, 2)
+        self.assertEqual(_fetches('error'), errors + 2)
+        self.assertEqual(_fetches('circuit_open'), rejected + 3)
+
+    def test_single_flight(self) -> None:
+        self.server.delay = 0.2
+        provider = DolarBlueProvider(self.server.url)
+
+        rates = []
+        threads = [
+            threading.Thread(target=lambda: rates.append(provider.get_rate())) for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertListEqual(rates, [Decimal('1000.00')] * 10)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_stale_while_revalidate(self) -> None:
+        provider = DolarBlueProvider(self.server.url, ttl=0, stale_ttl=60)
+        self.assertEqual(provider.get_rate(), Decimal('1000.00'))
+
+        self.server.data[1]['casa']['venta'] = '2.000,00'
+        self.server.delay = 0.5
+
+        # the stale rate is returned at once while it is refreshed in the background
+        started = time.monotonic()
+        self.assertEqual(provider.get_rate(), Decimal('1000.00'))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_stale_single_refresh(self) -> None:
+        # pylint: disable=protected-access
+        provider = DolarBlueProvider(self.server.url, ttl=0, stale_ttl=60, failure_threshold=1)
+        provider.get_rate()
+        self.server.delay = 0.2
+
+        refreshes = []
+        refresh = provider._refresh_quietly
+        provider._refresh_quietly = lambda: refreshes.append(refresh())  # type: ignore
+
+        for _ in range(10):
+            provider.get_rate()
+        self.assertEqual(len(refreshes), 0)  # still running
+
+        # the refresh fails and opens the circuit, the stale reads start no refresh meanwhile
+        self.server.status = 503
+        time.sleep(0.3)
+        for _ in range(10):
+            self.assertEqual(provider.get_rate(), Decimal('1000.00'))
+        time.sleep(0.1)
+        self.assertEqual(len(refreshes), 1)
+        self.assertEqual(self.server.hits, 2)
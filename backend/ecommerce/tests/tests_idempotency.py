@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from django.db import connection
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.idempotency import get_idempotency_store
+from ecommerce.models import Order, Product
+from ecommerce.tests.base_api_testcase import BaseApiTransactionTestCase
+
+
+class IdempotencyTestCase(BaseApiTransactionTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+        get_idempotency_store().clear()
+        self.product = Product.objects.create(name='product 1', price=10, stock=100)
+
+    def _request(
+        self, method: str, url: str, data: Dict[str, Any], key: Optional[str] = 'key-1'
+    ) -> Any:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key is not None else {}
+        try:
+            return getattr(client, method)(
+                f'/api/{self.api_version}/{url}', data, format='json', **headers
+            )
+        finally:
+            connection.close()
+
+    def _register(self, cuantity: int = 1, key: Optional[str] = 'key-1') -> Any:
+        return self._request(
+            'post',
+            'order/register_order/',
+            {'products': [{'cuantity': cuantity, 'product': str(self.product.pk)}]},
+            key
+        )
+
+    def test_replay(self) -> None:
+        first = self._register()
+        retry = self._register()
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Content-Type'], first['Content-Type'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.query_stats.count, 0)
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 99)
+
+        # another key, or none, is another order
+        self.assertNotEqual(self._register(key='key-2').content, first.content)
+        self.assertNotIn('Idempotent-Replayed', self._register(key=None))
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_update_order(self) -> None:
+        order_id = self._register(key=None).json()['id']
+        data = {'products': [{'cuantity': 5, 'product': str(self.product.pk)}]}
+
+        first = self._request('put', f'order/{order_id}/update_order/', data)
+        retry = self._request('put', f'order/{order_id}/update_order/', data)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.content, first.content)
+        self.assertIn('Idempotent-Replayed', retry)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 95)
+
+    def test_async_register_order(self) -> None:
+        data = {'products': [{'cuantity': 1, 'product': str(self.product.pk)}]}
+
+        first = self._request('post', 'async/order/register_order/', data)
+        retry = self._request('post', 'async/order/register_order/', data)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(
+            self._request('post', 'async/order/register_order/', {'products': []}).status_code,
+            status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    def test_key_reused_with_another_request(self) -> None:
+        self._register(1)
+
+        response = self._register(2)
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self._register(key='').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_concurrent_duplicates(self) -> None:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(lambda _: self._register(), range(8)))
+
+        self.assertEqual({response.content for response in responses}, {responses[0].content})
+        self.assertEqual({response.status_code for response in responses}, {201})
+        self.assertEqual(Order.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_STORE={
+        'BACKEND': 'ecommerce.idempotency.LocalIdempotencyStore', 'OPTIONS': {'ttl': 0.2}
+    })
+    def test_expiration(self) -> None:
+        first = self._register()
+        time.sleep(0.3)
+
+        self.assertNotEqual(self._register().content, first.content)
+        self.assertEqual(Order.objects.count(), 2)
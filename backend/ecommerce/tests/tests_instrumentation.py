@@ -0,0 +1,72 @@
+import json
+from typing import Any, Dict, List
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+
+
+class QueryInstrumentationTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        self.products = [
+            self._create_product(name=f'product {number}', price='100', stock=100)['id']
+            for number in range(5)
+        ]
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def _register_order(self, lines: int) -> Any:
+        response = self.client.post(
+            f'/api/{self.api_version}/order/register_order/',
+            {'products': self._lines(lines)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def _lines(self, lines: int) -> List[Dict[str, Any]]:
+        return [{'cuantity': 1, 'product': product} for product in self.products[:lines]]
+
+    def test_server_timing(self) -> None:
+        response = self.client.get(f'/api/{self.api_version}/product/')
+
+        self.assertEqual(response.view_name, 'ProductViewSet.list')
+        self.assertRegex(
+            response['Server-Timing'],
+            rf'^db;dur=[\d.]+;desc="{response.query_stats.count} queries", total;dur=[\d.]+$'
+        )
+
+    def test_order_query_budgets(self) -> None:
+        for lines in (1, len(self.products)):
+            order_id = self._register_order(lines).json()['id']
+            url = f'/api/{self.api_version}/order/{order_id}/'
+
+            self.assertQueryBudget(self._register_order(lines))
+            self.assertQueryBudget(
+                self.client.put(
+                    f'{url}update_order/', {'products': self._lines(lines)[::-1]}, format='json'
+                )
+            )
+            self.assertQueryBudget(self.client.post(f'{url}get_total/'))
+            self.assertQueryBudget(self.client.delete(url))
+
+    def test_product_query_budgets(self) -> None:
+        self.assertQueryBudget(self.client.get(f'/api/{self.api_version}/product/'))
+        self.assertQueryBudget(
+            self.client.get(f'/api/{self.api_version}/product/{self.products[0]}/')
+        )
+
+    @override_settings(QUERY_BUDGETS={'ProductViewSet.list': 0})
+    def test_over_budget_logged(self) -> None:
+        with self.assertLogs('service.instrumentation', 'WARNING') as logs:
+            self.client.get(f'/api/{self.api_version}/product/?search=product')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'ProductViewSet.list')
+        self.assertEqual(record['query_budget'], 0)
+        self.assertGreater(record['queries'], 0)
+        self.assertIn('SELECT', record['slowest_query'])
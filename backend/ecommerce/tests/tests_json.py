@@ -0,0 +1,68 @@
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from djmoney.money import Money
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from ecommerce.models import Product
+from ecommerce.parsers import JsonParser
+from ecommerce.renderers import JsonRenderer
+from ecommerce.serializers import ProductSerializer
+
+
+class JsonTestCase(SimpleTestCase):
+    # pylint: disable=invalid-name
+    def assertRenderedLikeDrf(self, data: Any, **kwargs: Any) -> None:
+        self.assertEqual(
+            JsonRenderer().render(data, **kwargs), JSONRenderer().render(data, **kwargs)
+        )
+
+    def test_render(self) -> None:
+        products = ProductSerializer(
+            [Product(name=f'product {number} ñ', price=Decimal('10.5'), stock=number)
+             for number in range(3)],
+            many=True
+        ).data
+        self.assertIsInstance(products, ReturnList)
+
+        self.assertRenderedLikeDrf(products)
+        self.assertRenderedLikeDrf({
+            'decimal': Decimal('12.30'),
+            'uuid': uuid.uuid4(),
+            'datetime': datetime.datetime(
+                2022, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+            ),
+            'date': datetime.date(2022, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'lazy': gettext_lazy('text'),
+            'separators': 'a b c',
+            'nested': OrderedDict([('b', [1, 2.5, None, True]), ('a', {1: 'int key'})]),
+            'big': 2 ** 70,
+        })
+        self.assertRenderedLikeDrf({'a': [1, 2]}, accepted_media_type='application/json; indent=4')
+        self.assertEqual(JsonRenderer().render(None), b'')
+
+    def test_render_money(self) -> None:
+        self.assertEqual(
+            JsonRenderer().render({'total': Money('10.50', 'USD')}),
+            JSONRenderer().render({'total': Decimal('10.50')})
+        )
+
+    def test_parse(self) -> None:
+        content = '{"products": [{"cuantity": 1, "product": "ñ"}], "price": 10.5}'.encode()
+
+        self.assertEqual(
+            JsonParser().parse(io.BytesIO(content)), JSONParser().parse(io.BytesIO(content))
+        )
+        for invalid in (b'{"products": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                JsonParser().parse(io.BytesIO(invalid))
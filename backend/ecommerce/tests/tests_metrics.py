@@ -0,0 +1,80 @@
+from typing import Optional
+
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+
+
+def _sample(name: str, **labels: str) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(name, labels)
+    return value or 0
+
+
+class MetricsTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        self.product_id = self._create_product(name='product 1', price='100', stock=5)['id']
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def _register_order(self, cuantity: int) -> int:
+        response = self.client.post(
+            f'/api/{self.api_version}/order/register_order/',
+            {'products': [{'cuantity': cuantity, 'product': self.product_id}]},
+            format='json'
+        )
+        return response.status_code
+
+    def test_request_metrics(self) -> None:
+        labels = {'view': 'OrderViewSet.register_order', 'method': 'POST', 'status': '201'}
+        requests = _sample('http_requests_total', **labels)
+        durations = _sample(
+            'http_request_duration_seconds_count', view='OrderViewSet.register_order'
+        )
+
+        self.assertEqual(self._register_order(1), status.HTTP_201_CREATED)
+
+        self.assertEqual(_sample('http_requests_total', **labels), requests + 1)
+        self.assertEqual(
+            _sample('http_request_duration_seconds_count', view='OrderViewSet.register_order'),
+            durations + 1
+        )
+        self.assertGreater(
+            _sample('http_request_db_queries_sum', view='OrderViewSet.register_order'), 0
+        )
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'http_requests_total{method="POST",status="201",view="OrderViewSet.register_order"}',
+            response.content.decode()
+        )
+
+    def test_unknown_method(self) -> None:
+        labels = {'view': 'ProductViewSet', 'method': 'other', 'status': '405'}
+        requests = _sample('http_requests_total', **labels)
+
+        response = self.client.generic('FOO-1', f'/api/{self.api_version}/product/')
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertEqual(_sample('http_requests_total', **labels), requests + 1)
+        self.assertNotIn('FOO-1', self.client.get('/metrics').content.decode())
+
+    def test_stock_conflicts(self) -> None:
+        conflicts = _sample('order_stock_conflicts_total', operation='register')
+
+        self.assertEqual(self._register_order(6), status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(
+            _sample('order_stock_conflicts_total', operation='register'), conflicts + 1
+        )
+
+    def test_pool_metrics(self) -> None:
+        self.assertGreaterEqual(_sample('db_pool_checkouts_total', database='default'), 1)
+        self.assertEqual(_sample('db_pool_checkout_timeouts_total', database='default'), 0)
+        content = self.client.get('/metrics').content.decode()
+        self.assertIn('db_pool_connections_in_use{database="default"}', content)
+        self.assertIn('db_pool_checkout_wait_seconds_total{database="default"}', content)
@@ -1,10 +1,19 @@
+import json
+from decimal import Decimal
+from io import StringIO
 from typing import Any, Dict, List, Union
 
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from ecommerce import exporter
 from ecommerce.models import Order, OrderDetail, Product
 from ecommerce.tests.base_api_testcase import BaseApiTestCase
+from service import settings
 
 
 class OrderTestCase(BaseApiTestCase):
@@ -88,6 +97,75 @@ class OrderTestCase(BaseApiTestCase):
                 product_test['stock'] - product_order['cuantity']  # type: ignore
             )
 
+    def test_register_order_constant_queries(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        queries = []
+        for products in (self.products[:1], self.products):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(
+                    f'/api/{self.api_version}/order/register_order/',
+                    {'products': [{'cuantity': 1, 'product': p['id']} for p in products]},
+                    format='json'
+                )
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            queries.append(len(context.captured_queries))
+
+        self.assertEqual(queries[0], queries[1])
+
+    def test_register_order_insufficient_stock(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(
+            f'/api/{self.api_version}/order/register_order/',
+            {
+                'products': [
+                    {'cuantity': 1, 'product': self.products[0]['id']},
+                    {'cuantity': 100, 'product': self.products[1]['id']},
+                ]
+            },
+            format='json'
+        )
+
+        # check request
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()['message'],
+            f'the product stock is not sufficient: 52 ({self.products[1]["id"]})'
+        )
+
+        # check db
+        self.assertEqual(Order.objects.count(), 0)
+        for product_data in self.products:
+            product = Product.objects.get(id=product_data['id'])
+            self.assertEqual(product.stock, product_data['stock'])
+
+    def test_register_order_product_not_found(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(
+            f'/api/{self.api_version}/order/register_order/',
+            {
+                'products': [
+                    {'cuantity': 1, 'product': self.products[0]['id']},
+                    {'cuantity': 1, 'product': '00000000-0000-0000-0000-000000000000'},
+                ]
+            },
+            format='json'
+        )
+
+        # check request
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # check db
+        self.assertEqual(Order.objects.count(), 0)
+        product = Product.objects.get(id=self.products[0]['id'])
+        self.assertEqual(product.stock, self.products[0]['stock'])
+
     def test_edit_order(self) -> None:
         order_update = [
             {
@@ -138,6 +216,44 @@ class OrderTestCase(BaseApiTestCase):
                     product_test['stock'] - product_order['cuantity']  # type: ignore
                 )
 
+    def test_edit_order_add_and_remove_products(self) -> None:
+        order_update = [
+            {
+                'cuantity': 0,
+                'product': self.products[0]['id']
+            },
+            {
+                'cuantity': 3,
+                'product': self.products[2]['id']
+            }
+        ]
+
+        # send order
+        order_id = self._create_order()['id']
+
+        # send request
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.put(
+            f'/api/{self.api_version}/order/{order_id}/update_order/',
+            {'products': order_update},
+            format='json'
+        )
+
+        # check request
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # check db
+        order_details = OrderDetail.objects.filter(order_id=order_id)
+        self.assertDictEqual(
+            {str(detail.product_id): detail.cuantity for detail in order_details},
+            {self.products[1]['id']: 7, self.products[2]['id']: 3}
+        )
+
+        stocks = [Product.objects.get(id=p['id']).stock for p in self.products]
+        self.assertListEqual(stocks, [51, 52 - 7, 53 - 3])
+
     def test_delete_order(self) -> None:
         # send order
         resp_data = self._create_order()
@@ -172,6 +288,189 @@ class OrderTestCase(BaseApiTestCase):
             order_detail_obj = OrderDetail.objects.filter(id=order_detail.id).first()
             self.assertIsNone(order_detail_obj)
 
+    def test_order_total(self) -> None:
+        # send order
+        order_id = self._create_order()['id']
+        self.assertEqual(Order.objects.get(id=order_id).total.amount, Decimal(5 * 200 + 7 * 202))
+
+        # update order
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.put(
+            f'/api/{self.api_version}/order/{order_id}/update_order/',
+            {
+                'products': [
+                    {'cuantity': 0, 'product': self.products[0]['id']},
+                    {'cuantity': 2, 'product': self.products[2]['id']},
+                ]
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # check request
+        response = client.post(f'/api/{self.api_version}/order/{order_id}/get_total/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(str(response.json()['total'])), Decimal(7 * 202 + 2 * 203))
+
+    def test_get_totals(self) -> None:
+        orders = [self._create_order()['id'] for _ in range(3)]
+        date_from = Order.objects.get(id=orders[1]).date_time
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        for query, expected in (
+            ({'orders': orders[:2]}, orders[:2]),
+            ({'date_from': date_from.isoformat()}, orders[1:]),
+        ):
+            response = client.post(
+                f'/api/{self.api_version}/order/get_totals/', query, format='json'
+            )
+
+            # check request
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            totals = response.json()['totals']
+            self.assertListEqual([total['order'] for total in totals], expected)
+            for total in totals:
+                self.assertEqual(Decimal(total['total']), Decimal(5 * 200 + 7 * 202))
+                self.assertNotIn('total_usd', total)
+
+    def test_get_totals_without_filter(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(f'/api/{self.api_version}/order/get_totals/', {}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_totals_limit(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(
+            f'/api/{self.api_version}/order/get_totals/',
+            {'orders': list(range(1, settings.ORDER_TOTALS_LIMIT + 2))},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Order.objects.bulk_create(Order() for _ in range(settings.ORDER_TOTALS_LIMIT + 1))
+        # checked before the exchange rate is fetched (the service is unreachable)
+        with override_settings(EXCHANGE_RATE={
+            'PROVIDER': 'ecommerce.exchange.DolarBlueProvider',
+            'OPTIONS': {'url': 'http://127.0.0.1:9/', 'timeout': 0.1},
+        }):
+            response = client.post(
+                f'/api/{self.api_version}/order/get_totals/',
+                {'date_from': '2000-01-01T00:00:00Z', 'usd': True},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_orders(self) -> None:
+        orders = [self._create_order()['id'] for _ in range(3)]
+        date_from = Order.objects.get(id=orders[1]).date_time
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        # ndjson
+        response = client.get(
+            f'/api/{self.api_version}/order/export/', {'date_from': date_from.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertListEqual(
+            [(row['order'], row['product'], row['cuantity']) for row in rows],
+            [
+                (order_id, item['product'], item['cuantity'])
+                for order_id in orders[1:] for item in self.new_order
+            ]
+        )
+        self.assertEqual(Decimal(rows[0]['price']), Decimal(self.products[0]['price']))
+
+        # csv
+        response = client.get(f'/api/{self.api_version}/order/export/', {'output': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('order,date_time,total,'))
+        self.assertEqual(len(lines), 1 + len(orders) * len(self.new_order))
+
+        # an order per query
+        self.assertListEqual(
+            list(exporter.iter_order_rows(Order.objects.all(), 1)),
+            list(exporter.iter_order_rows(Order.objects.all(), 100))
+        )
+
+    def test_reconcile_order_totals(self) -> None:
+        order_ids = [self._create_order()['id'] for _ in range(2)]
+        Order.objects.filter(id=order_ids[0]).update(total=Decimal(1))
+
+        stdout = StringIO()
+        call_command('reconcile_order_totals', batch_size=1, stdout=stdout)
+
+        self.assertIn(f'order {order_ids[0]}: stored 1.00 ARS', stdout.getvalue())
+        self.assertIn('2 orders checked, 1 drifted', stdout.getvalue())
+        for order in Order.objects.all():
+            self.assertEqual(order.total.amount, Decimal(5 * 200 + 7 * 202))
+
+    def test_total_at_ordered_prices(self) -> None:
+        order = Order.objects.get(id=self._create_order()['id'])
+        Product.objects.filter(id=self.products[0]['id']).update(price=Decimal(300))
+
+        # the cuantity of an ordered product changes at its ordered price, a new one is added at
+        # its current price
+        order.update_details([(2, str(self.products[0]['id']))])
+        Product.objects.filter(id=self.products[2]['id']).update(price=Decimal(100))
+        order.update_details([(1, str(self.products[2]['id']))])
+
+        expected = Decimal(2 * 200 + 7 * 202 + 1 * 100)
+        order.refresh_from_db()
+        self.assertEqual(order.total.amount, expected)
+
+        stdout = StringIO()
+        call_command('reconcile_order_totals', stdout=stdout)
+        self.assertIn('1 orders checked, 0 drifted', stdout.getvalue())
+
+    def test_cancel_orders(self) -> None:
+        # send orders
+        orders = [self._create_order()['id'] for _ in range(3)]
+
+        # send request
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        response = client.post(
+            f'/api/{self.api_version}/order/cancel_orders/',
+            {'orders': orders[:2]},
+            format='json'
+        )
+
+        # check request
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertDictEqual(response.json(), {'cancelled': 2})
+
+        # check db
+        self.assertListEqual(list(Order.objects.values_list('id', flat=True)), orders[2:])
+        self.assertEqual(OrderDetail.objects.count(), len(self.new_order))
+
+        for product_data, product_order in zip(self.products, self.new_order):
+            product = Product.objects.get(id=product_data['id'])
+            self.assertEqual(
+                product.stock,
+                product_data['stock'] - product_order['cuantity']  # type: ignore
+            )
+
     def test_get_order_details(self) -> None:
         # send order
         resp_order_data = self._create_order()
@@ -205,6 +504,30 @@ class OrderTestCase(BaseApiTestCase):
             self.assertIsNotNone(order_detail)
             self.assertEqual(detail['cuantity'], order_detail.cuantity)  # type: ignore
 
+    def test_get_order_conditional(self) -> None:
+        order_id = self._create_order()['id']
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        url = f'/api/{self.api_version}/order/{order_id}/'
+
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # editing the details saves the order
+        response = client.put(
+            f'/api/{self.api_version}/order/{order_id}/update_order/',
+            {'products': [{'cuantity': 1, 'product': self.products[2]['id']}]},
+            format='json'
+        )
+        self.assertLess(response.status_code, 300)
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_list_orders(self) -> None:
         # send orders
         orders_number = 5
@@ -219,7 +542,30 @@ class OrderTestCase(BaseApiTestCase):
         # check request
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        resp_data = response.json()
+        resp_data = response.json()['results']
         self.assertEqual(len(resp_data), orders_number)
 
         self.assertListEqual(orders, [o['id'] for o in resp_data])
+
+    def test_list_orders_pagination(self) -> None:
+        # send orders
+        orders = [self._create_order()['id'] for _ in range(5)]
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        # walk the pages
+        pages = []
+        url = f'/api/{self.api_version}/order/?page_size=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            resp_data = response.json()
+            self.assertNotIn('count', resp_data)
+
+            pages.append([o['id'] for o in resp_data['results']])
+            url = resp_data['next']
+
+        self.assertListEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertListEqual(orders, [order_id for page in pages for order_id in page])
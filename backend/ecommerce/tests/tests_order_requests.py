@@ -0,0 +1,79 @@
+from io import StringIO
+from typing import Any, Dict, List
+
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.models import Order, OrderRequest, Product
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+
+
+class OrderRequestTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        self.product = Product.objects.create(name='product 1', price=10, stock=5)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def _enqueue(self, products: List[Dict[str, Any]]) -> Any:
+        return self.client.post(
+            f'/api/{self.api_version}/order/enqueue_order/', {'products': products}, format='json'
+        )
+
+    def _process(self) -> str:
+        stdout = StringIO()
+        call_command('process_order_requests', '--once', stdout=stdout)
+        return stdout.getvalue()
+
+    def test_enqueue_order(self) -> None:
+        response = self._enqueue([{'cuantity': 2, 'product': str(self.product.pk)}])
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertQueryBudget(response)
+        self.assertEqual(response.json()['status'], OrderRequest.PENDING)
+        self.assertEqual(response['Location'], response.json()['url'])
+        self.assertFalse(Order.objects.exists())
+
+        self.assertIn('1 orders: 1 accepted, 0 rejected', self._process())
+
+        response = self.client.get(response['Location'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertQueryBudget(response)
+        self.assertEqual(response.json()['status'], OrderRequest.ACCEPTED)
+        order = Order.objects.get(pk=response.json()['order'])
+        self.assertEqual(order.total.amount, 20)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_orders_accepted_or_rejected_individually(self) -> None:
+        for products in (
+            [{'cuantity': 3, 'product': str(self.product.pk)}],
+            [{'cuantity': 3, 'product': str(self.product.pk)}],  # 2 left
+            [{'cuantity': 1, 'product': 'unknown'}],
+            [{'cuantity': 2, 'product': str(self.product.pk)}],
+        ):
+            self._enqueue(products)
+
+        self._process()
+
+        requests = list(OrderRequest.objects.order_by('pk'))
+        self.assertEqual(
+            [order_request.status for order_request in requests],
+            ['accepted', 'rejected', 'rejected', 'accepted']
+        )
+        self.assertIn('not sufficient', requests[1].message)
+        self.assertIn('product not found', requests[2].message)
+        self.assertEqual(Order.objects.count(), 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+    def test_enqueue_invalid_order(self) -> None:
+        product = str(self.product.pk)
+
+        response = self._enqueue([{'cuantity': 1, 'product': product}] * 2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self._enqueue([{'cuantity': -1, 'product': product}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OrderRequest.objects.exists())
@@ -0,0 +1,88 @@
+import time
+from typing import Any
+
+import psycopg2
+from django.db import connection
+from django.test import SimpleTestCase
+
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+from service.db.pool import ConnectionPool, PoolTimeout, get_pool_stats
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    def _pool(self, **kwargs: Any) -> ConnectionPool:
+        params = connection.get_connection_params()
+        pool = ConnectionPool(lambda: psycopg2.connect(**params), **kwargs)
+        self.addCleanup(pool.close_idle)
+        return pool
+
+    def test_reuse(self) -> None:
+        pool = self._pool()
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(pool.stats()['connections'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+        pool.putconn(conn)
+
+    def test_recycle(self) -> None:
+        pool = self._pool(max_uses=2)
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+        pool.putconn(pool.getconn())
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['recycled'], 1)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_broken_connection(self) -> None:
+        pool = self._pool(check_idle=0)
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+        with psycopg2.connect(**connection.get_connection_params()) as admin:
+            with admin.cursor() as cursor:
+                cursor.execute('SELECT pg_terminate_backend(%s)', [conn.get_backend_pid()])
+
+        new_conn = pool.getconn()
+
+        self.assertIsNot(new_conn, conn)
+        self.assertEqual(pool.stats()['discarded'], 1)
+        pool.putconn(new_conn)
+
+    def test_timeout(self) -> None:
+        pool = self._pool(max_size=1, timeout=0.2)
+        conn = pool.getconn()
+
+        started = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        pool.putconn(conn)
+
+    def test_rollback_on_return(self) -> None:
+        pool = self._pool()
+
+        conn = pool.getconn()
+        conn.autocommit = False
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertTrue(conn.autocommit)
+        pool.putconn(conn)
+
+
+class PooledBackendTestCase(BaseApiTestCase):
+    def test_pool_stats(self) -> None:
+        self._create_product(name='test 1', price='10', stock=1)
+
+        stats = get_pool_stats()['default']
+        self.assertGreaterEqual(stats['checkouts'], 1)
+        self.assertEqual(stats['timeouts'], 0)
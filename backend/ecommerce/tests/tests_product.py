@@ -1,6 +1,10 @@
+import json
+import tempfile
 from decimal import Decimal
+from io import StringIO
 from typing import Dict, List, Union
 
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -192,7 +196,7 @@ class ProductTestCase(BaseApiTestCase):
         # check response
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        resp_data = response.json()
+        resp_data = response.json()['results']
 
         self.assertIsInstance(resp_data, list)
         self.assertEqual(len(products), len(resp_data))
@@ -204,3 +208,177 @@ class ProductTestCase(BaseApiTestCase):
             self.assertIn('price_currency', resp_product)
             self.assertIn('price', resp_product)
             self.assertIn('stock', resp_product)
+
+    def test_search_products(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        self._create_product(name='Red Apple', price='100', stock=5)
+        self._create_product(name='Green apple juice', price='250', stock=50)
+        self._create_product(name='Red wine', price='900', stock=10)
+
+        def names(**params: Union[str, int]) -> List[str]:
+            response = client.get(f'/api/{self.api_version}/product/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [product['name'] for product in response.json()['results']]
+
+        self.assertListEqual(
+            names(search='appl', ordering='price'), ['Red Apple', 'Green apple juice']
+        )
+        self.assertListEqual(names(search='red', stock_max=9), ['Red Apple'])
+        self.assertListEqual(
+            names(price_min='200', price_max='900', ordering='-price'),
+            ['Red wine', 'Green apple juice']
+        )
+
+        response = client.get(f'/api/{self.api_version}/product/', {'stock_min': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_products_ordering_pages(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        for price in ('300', '100', '200', '100', '400'):
+            self._create_product(name='test', price=price, stock=1)
+
+        prices = []
+        url = f'/api/{self.api_version}/product/?ordering=-price&page_size=2'
+        while url:
+            resp_data = client.get(url).json()
+            prices.extend(Decimal(product['price']) for product in resp_data['results'])
+            url = resp_data['next']
+
+        self.assertListEqual(prices, [Decimal(p) for p in ('400', '300', '200', '100', '100')])
+
+    def test_get_products_ordering_ties(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        # more rows with the same stock than the offset of a DRF cursor can skip
+        Product.objects.bulk_create(
+            Product(name=f'tie {number}', price=10, stock=1) for number in range(1200)
+        )
+        Product.objects.bulk_create(
+            Product(name=f'last {number}', price=10, stock=2) for number in range(3)
+        )
+
+        ids: List[str] = []
+        url = f'/api/{self.api_version}/product/?ordering=-stock&page_size=250'
+        while url:
+            resp_data = client.get(url).json()
+            ids.extend(product['id'] for product in resp_data['results'])
+            previous, url = resp_data['previous'], resp_data['next']
+
+        self.assertEqual(len(ids), 1203)
+        self.assertEqual(len(set(ids)), 1203)
+        expected = Product.objects.order_by('-stock', '-id').values_list('pk', flat=True)
+        self.assertListEqual(ids, [str(pk) for pk in expected])
+
+        # back from the last page
+        resp_data = client.get(previous).json()
+        self.assertListEqual([product['id'] for product in resp_data['results']], ids[-453:-203])
+
+    def test_get_product_conditional(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        product_id = self._create_product(name='test', price='100', stock=10)['id']
+        url = f'/api/{self.api_version}/product/{product_id}/'
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        # a bulk stock update changes the validator
+        Product.objects.add_stock({product_id: -1})
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['stock'], 9)
+
+    def test_get_products_conditional(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        for price in ('300', '100', '200'):
+            self._create_product(name='test', price=price, stock=1)
+        url = f'/api/{self.api_version}/product/?ordering=price&page_size=2'
+
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self._create_product(name='test', price='50', stock=1)
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.json()['results'][0]['price']), Decimal('50'))
+
+    def test_import_products_csv(self) -> None:
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+        product_id = self._create_product(name='test 8', price='100', stock=1)['id']
+
+        # request
+        response = client.post(
+            f'/api/{self.api_version}/product/import_products/',
+            'id,name,price,price_currency,stock\n'
+            f'{product_id},"test 8, updated",150.50,,8\n'
+            ',test 9,10,USD,9\n'
+            ',test 10,invalid,,10\n',
+            content_type='text/csv'
+        )
+
+        # check response
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        resp_data = response.json()
+        self.assertEqual(resp_data['rows'], 3)
+        self.assertEqual(resp_data['imported'], 2)
+        self.assertEqual(len(resp_data['chunks']), 1)
+        self.assertListEqual(
+            [error['row'] for error in resp_data['chunks'][0]['errors']], [3]
+        )
+        self.assertIn('price', resp_data['chunks'][0]['errors'][0]['errors'])
+
+        # check db
+        product_obj = Product.objects.get(id=product_id)
+        self.assertEqual(product_obj.name, 'test 8, updated')
+        self.assertEqual(product_obj.price.amount, Decimal('150.50'))
+        self.assertEqual(product_obj.stock, 8)
+
+        product_obj = Product.objects.get(name='test 9')
+        self.assertEqual(product_obj.price.amount, Decimal('10'))
+        self.assertEqual(str(product_obj.price.currency), 'USD')
+        self.assertEqual(product_obj.stock, 9)
+
+        self.assertFalse(Product.objects.filter(name='test 10').exists())
+
+    def test_import_products_command(self) -> None:
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as products_file:
+            for number in range(5):
+                products_file.write(
+                    json.dumps({'name': f'import {number}', 'price': '9.99', 'stock': number})
+                    + '\n'
+                )
+            products_file.write('{not json\n')
+            products_file.flush()
+
+            stdout, stderr = StringIO(), StringIO()
+            call_command(
+                'import_products', products_file.name, '--chunk-size=2',
+                stdout=stdout, stderr=stderr
+            )
+
+        self.assertIn('chunk 3: 1 of 2 rows imported', stdout.getvalue())
+        self.assertIn('5 of 6 rows imported', stdout.getvalue())
+        self.assertIn('row 6:', stderr.getvalue())
+        self.assertEqual(Product.objects.filter(name__startswith='import ').count(), 5)
@@ -0,0 +1,107 @@
+from typing import Any, Tuple
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.cache import get_product_cache
+from ecommerce.models import Order, Product
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+
+
+class ProductCacheTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        self.product = Product.objects.create(name='product 1', price=10, stock=10)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def _get(self, url: str, **kwargs: Any) -> Tuple[Any, int]:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/{self.api_version}/{url}', **kwargs)
+
+        return response, len(context)
+
+    def test_detail_served_from_cache(self) -> None:
+        url = f'product/{self.product.pk}/'
+        response, _ = self._get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        cached, queries = self._get(url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        not_modified, queries = self._get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(queries, 0)
+
+        self.assertDictEqual(get_product_cache().stats(), {'hits': 2, 'misses': 1})
+
+    def test_list_served_from_cache(self) -> None:
+        response, _ = self._get('product/')
+
+        cached, queries = self._get('product/')
+        self.assertEqual(queries, 0)
+        self.assertEqual(cached.json(), response.json())
+
+        # any product write invalidates the lists
+        Product.objects.create(name='product 2', price=20, stock=20)
+
+        response, queries = self._get('product/')
+        self.assertGreater(queries, 0)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_detail_kept_by_other_product_writes(self) -> None:
+        other = Product.objects.create(name='product 2', price=20, stock=20)
+        url = f'product/{self.product.pk}/'
+        self._get(url)
+        self._get('product/')
+
+        Order.objects.register([(3, str(other.pk))])
+
+        self.assertEqual(self._get(url)[1], 0)
+        self.assertGreater(self._get('product/')[1], 0)
+        self.assertEqual(self._get(f'product/{other.pk}/')[0].json()['stock'], 17)
+
+    def test_invalidated_by_stock_changes(self) -> None:
+        url = f'product/{self.product.pk}/'
+        self._get(url)
+
+        order = Order.objects.register([(3, str(self.product.pk))])
+        self.assertEqual(self._get(url)[0].json()['stock'], 7)
+
+        order.update_details([(1, str(self.product.pk))])
+        self.assertEqual(self._get(url)[0].json()['stock'], 9)
+
+        order.delete()
+        self.assertEqual(self._get(url)[0].json()['stock'], 10)
+
+        self.client.delete(f'/api/{self.api_version}/{url}')
+        self.assertEqual(self._get(url)[0].status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(
+        PRODUCT_CACHE={'BACKEND': 'ecommerce.cache.SharedCacheBackend', 'OPTIONS': {'ttl': 60}}
+    )
+    def test_shared_backend(self) -> None:
+        get_product_cache().clear()
+
+        url = f'product/{self.product.pk}/'
+        self._get(url)
+        self.assertEqual(self._get(url)[1], 0)
+
+        Product.objects.add_stock({self.product.pk: 5})
+        self.assertEqual(self._get(url)[0].json()['stock'], 15)
+
+    def test_entry_read_before_a_write(self) -> None:
+        cache = get_product_cache()
+        key = cache.detail_key(self.product.pk)
+
+        # a write commits between the read of the row and the cache fill
+        Product.objects.add_stock({self.product.pk: 5})
+        cache.set(key, {'modified': self.product.modified, 'data': {'stock': 10}})
+
+        self.assertEqual(self._get(f'product/{self.product.pk}/')[0].json()['stock'], 15)
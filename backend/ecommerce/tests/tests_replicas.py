@@ -0,0 +1,81 @@
+from typing import Any, Tuple
+
+from django.core.cache import caches
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ecommerce.models import Order, Product
+from ecommerce.tests.base_api_testcase import BaseApiTransactionTestCase
+from service import authentication
+from service.routers import replica_health
+
+
+@override_settings(READ_REPLICAS=['replica'])
+class ReplicaRoutingTestCase(BaseApiTransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        authentication.clear_caches()
+        replica_health.clear()
+        caches['default'].clear()
+
+        self.product = Product.objects.create(name='product 1', price=10, stock=10)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def _queries(self, method: str, url: str, **kwargs: Any) -> Tuple[int, int]:
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = getattr(self.client, method)(f'/api/{self.api_version}/{url}', **kwargs)
+
+        self.assertLess(response.status_code, 300)
+        return len(primary), len(replica)
+
+    def test_read_from_replica(self) -> None:
+        primary, replica = self._queries('get', 'order/')
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_read_only_action(self) -> None:
+        order = Order.objects.register([(1, str(self.product.pk))])
+
+        primary, replica = self._queries(
+            'post', 'order/get_totals/', data={'orders': [order.pk]}, format='json'
+        )
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_read_your_writes(self) -> None:
+        primary, replica = self._queries(
+            'post',
+            'order/register_order/',
+            data={'products': [{'cuantity': 1, 'product': str(self.product.pk)}]},
+            format='json'
+        )
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        primary, replica = self._queries('get', f'product/{self.product.pk}/')
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_lagging_replica(self) -> None:
+        with override_settings(REPLICA_MAX_LAG=-1):
+            replica_health.clear()
+            primary, _ = self._queries('get', 'product/')
+
+        self.assertGreater(primary, 0)
+
+    def test_query_budgets(self) -> None:
+        # the lag checks and the refreshes of the token denylist run out of the requests
+        authentication.clear_caches()
+        for url in ('product/', f'product/{self.product.pk}/'):
+            response = self.client.get(f'/api/{self.api_version}/{url}')
+            self.assertQueryBudget(response)
@@ -0,0 +1,63 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from typing import Any
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce.tests.base_api_testcase import BaseApiTestCase
+from service.schema import get_schema_documents
+
+
+class SchemaTestCase(BaseApiTestCase):
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+
+        get_schema_documents.cache_clear()
+        self.addCleanup(get_schema_documents.cache_clear)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+
+    def _get_schema(self, **headers: Any) -> Any:
+        return self.client.get('/openapi-schema/', **headers)
+
+    def test_get_schema(self) -> None:
+        response = self._get_schema(HTTP_ACCEPT='application/vnd.oai.openapi+json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        schema = json.loads(response.content)
+        operation = schema['paths']['/api/{version}/order/register_order/']['post']
+        self.assertIn('requestBody', operation)
+        self.assertIn('Idempotency-Key', [param['name'] for param in operation['parameters']])
+        documents = get_schema_documents()
+
+        response = self._get_schema(
+            HTTP_ACCEPT='application/vnd.oai.openapi+json', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIs(get_schema_documents(), documents)  # rendered once
+
+    def test_get_schema_gzip(self) -> None:
+        plain = self._get_schema()
+        compressed = self._get_schema(HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+
+    def test_schema_file(self) -> None:
+        etag = self._get_schema()['ETag']
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'openapi.json')
+            call_command('generate_openapi_schema', path, stdout=io.StringIO())
+
+            get_schema_documents.cache_clear()
+            with override_settings(OPENAPI_SCHEMA_FILE=path):
+                self.assertEqual(self._get_schema()['ETag'], etag)
@@ -0,0 +1,130 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ecommerce import importer
+from ecommerce.exceptions import InsufficientStockError
+from ecommerce.models import Order, Product, StockShard
+from ecommerce.tests.base_api_testcase import BaseApiTransactionTestCase
+
+
+class StockReservationTestCase(BaseApiTransactionTestCase):
+    _STOCK = 20
+    _ORDERS = 40
+
+    def setUp(self) -> None:  # pylint: disable=invalid-name
+        super().setUp()
+        self.product = Product.objects.create(name='hot product', price=10, stock=self._STOCK)
+
+    def _order_concurrently(self) -> List[int]:
+        def register(_: int) -> int:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+            try:
+                return client.post(
+                    f'/api/{self.api_version}/order/register_order/',
+                    {'products': [{'cuantity': 1, 'product': str(self.product.pk)}]},
+                    format='json'
+                ).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return list(executor.map(register, range(self._ORDERS)))
+
+    def _assert_not_oversold(self, statuses: List[int]) -> None:
+        self.product.refresh_from_db()
+        sold = statuses.count(status.HTTP_201_CREATED)
+
+        self.assertEqual(sold, self._STOCK)
+        self.assertEqual(statuses.count(status.HTTP_400_BAD_REQUEST), self._ORDERS - self._STOCK)
+        self.assertEqual(self.product.total_stock(), 0)
+        self.assertEqual(Order.objects.count(), sold)
+
+    def test_concurrent_orders(self) -> None:
+        self._assert_not_oversold(self._order_concurrently())
+
+    def test_concurrent_orders_sharded(self) -> None:
+        Product.objects.shard_stock(self.product.pk, 4)
+
+        self._assert_not_oversold(self._order_concurrently())
+
+    def test_concurrent_multi_product_orders(self) -> None:
+        products = [self.product] + [
+            Product.objects.create(name=f'product {number}', price=10, stock=self._STOCK)
+            for number in range(3)
+        ]
+
+        def register_and_cancel(number: int) -> List[int]:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+            lines = [{'cuantity': 1, 'product': str(product.pk)} for product in products]
+            random.shuffle(lines)  # every order writes the products in another order
+            try:
+                response = client.post(
+                    f'/api/{self.api_version}/order/register_order/',
+                    {'products': lines},
+                    format='json'
+                )
+                statuses = [response.status_code]
+                if response.status_code == status.HTTP_201_CREATED and number % 2:
+                    statuses.append(client.delete(
+                        f'/api/{self.api_version}/order/{response.json()["id"]}/'
+                    ).status_code)
+                return statuses
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(register_and_cancel, range(self._ORDERS)))
+
+        self.assertTrue(all(
+            statuses[0] in (status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST)
+            and statuses[1:] in ([], [status.HTTP_204_NO_CONTENT])
+            for statuses in results
+        ), results)
+        kept = Order.objects.count()
+        for product in products:
+            product.refresh_from_db()
+            self.assertEqual(product.stock, self._STOCK - kept)
+
+    def test_shard_stock(self) -> None:
+        product = Product.objects.shard_stock(self.product.pk, 3)
+
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(
+            sorted(StockShard.objects.filter(product=product).values_list('stock', flat=True)),
+            [6, 7, 7]
+        )
+
+        # more than any shard has, taken from all of them
+        order = Order.objects.register([(15, str(product.pk))])
+        self.assertEqual(product.total_stock(), 5)
+        with self.assertRaises(InsufficientStockError):
+            Order.objects.register([(6, str(product.pk))])
+
+        order.update_details([(5, str(product.pk))])
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        response = client.get(f'/api/{self.api_version}/product/{product.pk}/')
+        self.assertEqual(response.json()['stock'], 15)
+        self.assertNotIn('ETag', response)
+
+        product = Product.objects.shard_stock(product.pk, 0)
+        self.assertEqual((product.stock, product.stock_shards), (15, 0))
+        self.assertFalse(StockShard.objects.filter(product=product).exists())
+
+    def test_import_sharded_product(self) -> None:
+        Product.objects.shard_stock(self.product.pk, 4)
+
+        reports = list(importer.import_products(
+            [{'id': str(self.product.pk), 'name': 'hot product', 'price': '10', 'stock': '9'}], 10
+        ))
+
+        self.assertEqual(reports[0]['imported'], 1)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock_shards, self.product.total_stock()), (4, 9))
@@ -1,42 +1,79 @@
 # pylint: disable=too-many-ancestors
-import json
-from datetime import datetime
 from decimal import Decimal
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
-import requests
-from django.db import transaction
-from django.db.models import F, Sum
-from django.shortcuts import get_object_or_404
-from rest_framework import status, viewsets
+from django.db.models import QuerySet
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
-from ecommerce.models import Order, OrderDetail, Product
+from ecommerce import exporter, importer
+from ecommerce.cache import ResponseCache, get_product_cache
+from ecommerce.conditional import ConditionalGetMixin
+from ecommerce.exceptions import ExchangeRateError, InsufficientStockError
+from ecommerce.exchange import get_exchange_rate_provider
+from ecommerce.filters import KeysetOrderingFilter, ProductFilter
+from ecommerce.idempotency import idempotent
+from ecommerce.models import Order, OrderDetail, OrderRequest, Product
+from ecommerce.pagination import OrderDetailPagination, OrderPagination, ProductPagination
+from ecommerce.parsers import CsvParser, NdjsonParser
 from ecommerce.schemes import ApiVersioningSchema, CustomOrderSchema
-from ecommerce.serializers import (ApiProductsOrderSerializer, ApiTotalMoneySerializer,
-                                   OrderDetailSerializer, OrderSerializer, ProductSerializer)
+from ecommerce.serializers import (ApiExportQuerySerializer, ApiOrdersSerializer,
+                                   ApiOrderTotalSerializer, ApiProductsOrderSerializer,
+                                   ApiTotalMoneySerializer, ApiTotalsQuerySerializer,
+                                   OrderDetailSerializer, OrderRequestSerializer, OrderSerializer,
+                                   ProductSerializer)
 from service import settings
 from service.views import ApiVersioning
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    read_only_actions = ['list', 'retrieve']
+    pagination_class = ProductPagination
+    filter_backends = [ProductFilter, KeysetOrderingFilter]
+    ordering_fields = ['name', 'price', 'stock']
+    ordering = ['id']
     versioning_class = ApiVersioning
     schema = ApiVersioningSchema(tags=['product'])
+    volatile_field = 'stock_shards'  # their stock is updated in the shards
 
+    def get_response_cache(self) -> Optional[ResponseCache]:
+        return get_product_cache()
 
-class OrderViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], parser_classes=[CsvParser, NdjsonParser])
+    def import_products(self, request: Request, version: Optional[str] = None) -> Response:
+        # pylint: disable=unused-argument
+        """Create or update products from a CSV or NDJSON stream."""
+        chunks = list(importer.import_products(request.data, settings.PRODUCT_IMPORT_CHUNK_SIZE))
+        return Response(
+            {
+                'rows': sum(chunk['rows'] for chunk in chunks),
+                'imported': sum(chunk['imported'] for chunk in chunks),
+                'chunks': chunks,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
+    modified_field = 'date_time'
     serializer_class = OrderSerializer
+    read_only_actions = [
+        'list', 'retrieve', 'export', 'order_details', 'get_total', 'get_total_usd', 'get_totals'
+    ]
+    pagination_class = OrderPagination
     versioning_class = ApiVersioning
     schema = CustomOrderSchema(tags=['order'])
 
-    @staticmethod
     @action(detail=False, methods=['post'])
-    def register_order(request: Request, version: Optional[str] = None) -> Response:
+    @idempotent
+    def register_order(self, request: Request, version: Optional[str] = None) -> Response:
         # pylint: disable=unused-argument
         """Register a order."""
         data_serializer = ApiProductsOrderSerializer(data=request.data)
@@ -45,34 +82,14 @@ class OrderViewSet(viewsets.ModelViewSet):
         order_data = [tuple(item.values()) for item in data_serializer.validated_data['products']]
         product_ids = [item[1] for item in order_data]
         if len(product_ids) == len(set(product_ids)):  # no duplicate products
-            with transaction.atomic():
-                sid = transaction.savepoint()
-
-                order = Order.objects.create()
-                for cuantity, product_id in order_data:
-                    product = get_object_or_404(Product, pk=product_id)
-                    if product.stock >= cuantity:
-                        product.stock -= cuantity
-                        product.save()
-
-                        OrderDetail.objects.create(
-                            order=order,
-                            cuantity=cuantity,
-                            product=product,
-                        )
-                    else:
-                        transaction.savepoint_rollback(sid)
-
-                        response = Response(
-                            {
-                                'message': 'the product stock is not sufficient: '
-                                           f'{product.stock} ({product_id})'
-                            },
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                        break
-                else:
-                    response = Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+            try:
+                order = Order.objects.register(order_data)
+            except Product.DoesNotExist as error:
+                raise Http404 from error
+            except InsufficientStockError as error:
+                response = Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                response = Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
         else:
             response = Response(
                 {'message': f'duplicate products were detected: {product_ids}'},
@@ -81,7 +98,32 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return response
 
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def enqueue_order(self, request: Request, version: Optional[str] = None) -> Response:
+        # pylint: disable=unused-argument
+        """Queue a order, registered by a worker, its status is at the returned URL."""
+        data_serializer = ApiProductsOrderSerializer(data=request.data)
+        data_serializer.is_valid(raise_exception=True)
+
+        products = data_serializer.validated_data['products']
+        product_ids = [item['product'] for item in products]
+        if len(product_ids) != len(set(product_ids)):
+            return Response(
+                {'message': f'duplicate products were detected: {product_ids}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        order_request = OrderRequest.objects.create(products=products)
+        url = reverse('orderrequest-detail', kwargs={'pk': order_request.pk}, request=request)
+        return Response(
+            {**OrderRequestSerializer(order_request).data, 'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url}
+        )
+
     @action(detail=True, methods=['put'])
+    @idempotent
     def update_order(
         self, request: Request, pk: Any = None, version: Optional[str] = None
     ) -> Response:
@@ -93,43 +135,15 @@ class OrderViewSet(viewsets.ModelViewSet):
         order_data = [tuple(item.values()) for item in data_serializer.validated_data['products']]
         product_ids = [item[1] for item in order_data]
         if len(product_ids) == len(set(product_ids)):  # no duplicate products
-            with transaction.atomic():
-                sid = transaction.savepoint()
-
-                order = self.get_object()
-                for cuantity, product_id in order_data:
-                    order_detail = get_object_or_404(
-                        OrderDetail, order=order, product__id=product_id
-                    )
-
-                    product = order_detail.product
-                    current_stock = product.stock + order_detail.cuantity
-                    if current_stock >= cuantity:
-                        if cuantity > order_detail.cuantity:
-                            product.stock -= (cuantity - order_detail.cuantity)
-                        elif cuantity < order_detail.cuantity:
-                            product.stock += (order_detail.cuantity - cuantity)
-
-                        product.save()
-
-                        order_detail.cuantity = cuantity
-                        order_detail.save()
-                    else:
-                        transaction.savepoint_rollback(sid)
-
-                        response = Response(
-                            {
-                                'message': 'the product stock is not sufficient: '
-                                           f'{current_stock} ({product_id})'
-                            },
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                        break
-                else:
-                    order.date_time = datetime.now()
-                    order.save()
-
-                    response = Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
+            order = self.get_object()
+            try:
+                order.update_details(order_data)
+            except Product.DoesNotExist as error:
+                raise Http404 from error
+            except InsufficientStockError as error:
+                response = Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            else:
+                response = Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
         else:
             response = Response(
                 {'message': f'duplicate products were detected: {product_ids}'},
@@ -138,6 +152,44 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return response
 
+    @action(detail=False, methods=['post'])
+    def cancel_orders(self, request: Request, version: Optional[str] = None) -> Response:
+        # pylint: disable=unused-argument
+        """Cancel many orders restoring the stock of their products."""
+        data_serializer = ApiOrdersSerializer(data=request.data)
+        data_serializer.is_valid(raise_exception=True)
+
+        _, deleted = self.get_queryset().filter(
+            pk__in=data_serializer.validated_data['orders']
+        ).delete()
+
+        return Response(
+            {'cancelled': deleted.get(Order._meta.label, 0)},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request: Request, version: Optional[str] = None) -> StreamingHttpResponse:
+        # pylint: disable=unused-argument
+        """Stream the orders with their details as NDJSON or CSV (``output`` parameter)."""
+        query_serializer = ApiExportQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query = query_serializer.validated_data
+
+        orders = self._filter_orders(query)
+        # the database is chosen now, the rows are streamed after the request routing is over
+        rows = exporter.iter_order_rows(
+            orders.using(orders.db), settings.ORDER_EXPORT_CHUNK_SIZE
+        )
+        if query['output'] == 'csv':
+            content = exporter.iter_csv(rows, settings.ORDER_EXPORT_CHUNK_SIZE)
+            content_type = 'text/csv'
+        else:
+            content = exporter.iter_ndjson(rows, settings.ORDER_EXPORT_CHUNK_SIZE)
+            content_type = 'application/x-ndjson'
+
+        return StreamingHttpResponse(content, content_type=content_type)
+
     @action(detail=True, methods=['get'])
     def order_details(
         self, request: Request, pk: Any = None, version: Optional[str] = None
@@ -167,46 +219,84 @@ class OrderViewSet(viewsets.ModelViewSet):
         """Obtain invoice data USD BLUE."""
         order = self.get_object()
         try:
-            resp_dolar = requests.get(settings.EXCHANGE_USD)
-            resp_dolar.raise_for_status()
+            dolar_blue = get_exchange_rate_provider().get_rate()
+        except ExchangeRateError:
+            response = Response(
+                {'message': 'error generating the result'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        else:
+            response = Response(
+                ApiTotalMoneySerializer({'total': self._get_total(order) / dolar_blue}).data,
+                status=status.HTTP_200_OK
+            )
+
+        return response
 
-            data = resp_dolar.json()
-            dolar_blue = next(
-                (val['casa']['venta'] for val in data if val['casa']['nombre'] == 'Dolar Blue'),
-                None
+    @action(detail=False, methods=['post'])
+    def get_totals(self, request: Request, version: Optional[str] = None) -> Response:
+        # pylint: disable=unused-argument
+        """Obtain the invoice data of many orders, by id or by date range."""
+        data_serializer = ApiTotalsQuerySerializer(data=request.data)
+        data_serializer.is_valid(raise_exception=True)
+        query = data_serializer.validated_data
+
+        limit = settings.ORDER_TOTALS_LIMIT
+        rows = list(self._filter_orders(query).values_list('pk', 'total')[:limit + 1])
+        if len(rows) > limit:
+            return Response(
+                {'message': f'more than {limit} orders match, narrow the date range'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            if dolar_blue:
-                dolar_blue_float = dolar_blue.replace('.', '').replace(',', '.')
-                response = Response(
-                    ApiTotalMoneySerializer({
-                        'total': self._get_total(order) / Decimal(dolar_blue_float),
-                    }).data,
-                    status=status.HTTP_200_OK
-                )
-            else:
-                response = Response(
-                    {'message': 'error generating the result'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-        except (requests.exceptions.RequestException, json.decoder.JSONDecodeError, KeyError):
+
+        try:
+            dolar_blue = get_exchange_rate_provider().get_rate() if query['usd'] else None
+        except ExchangeRateError:
             response = Response(
                 {'message': 'error generating the result'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        else:
+            totals = []
+            for pk, total in rows:
+                totals.append({'order': pk, 'total': total})
+                if dolar_blue:
+                    totals[-1]['total_usd'] = total / dolar_blue
+
+            response = Response(
+                {'totals': ApiOrderTotalSerializer(totals, many=True).data},
+                status=status.HTTP_200_OK
+            )
 
         return response
 
+    def _filter_orders(self, query: Dict[str, Any]) -> QuerySet:
+        orders = self.get_queryset()
+        if 'orders' in query:
+            orders = orders.filter(pk__in=query['orders'])
+        if 'date_from' in query:
+            orders = orders.filter(date_time__gte=query['date_from'])
+        if 'date_to' in query:
+            orders = orders.filter(date_time__lt=query['date_to'])
+
+        return orders
+
     @staticmethod
     def _get_total(order: Order) -> Decimal:
-        return Decimal(
-            OrderDetail.objects.filter(order=order).aggregate(
-                total=Sum(F('cuantity') * F('product__price'))
-            )['total']
-        )
+        return order.total.amount
+
+
+class OrderRequestViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    queryset = OrderRequest.objects.all()
+    serializer_class = OrderRequestSerializer
+    read_only_actions = ['retrieve']
+    versioning_class = ApiVersioning
+    schema = ApiVersioningSchema(tags=['order'])
 
 
 class OrderDetailViewSet(viewsets.ModelViewSet):
     queryset = OrderDetail.objects.all()
     serializer_class = OrderDetailSerializer
+    pagination_class = OrderDetailPagination
     versioning_class = ApiVersioning
     http_method_names: List[str] = []
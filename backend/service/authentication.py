@@ -0,0 +1,106 @@
+import copy
+import hashlib
+import time
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from service.caching import LRUCache
+from service.revocation import denylist
+
+
+_token_cache = LRUCache(
+    settings.JWT_AUTHENTICATION_CACHE['TOKEN_CACHE_SIZE'],
+    settings.JWT_AUTHENTICATION_CACHE['TOKEN_TTL']
+)
+
+_user_cache = LRUCache(
+    settings.JWT_AUTHENTICATION_CACHE['USER_CACHE_SIZE'],
+    settings.JWT_AUTHENTICATION_CACHE['USER_TTL']
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that does not hit the database for known tokens and users.
+
+    Verified tokens are cached by their hash until they expire and users are cached in a bounded
+    LRU cache with a time to live. Every hit checks the version of the user kept in the shared cache
+    (``CACHE_ALIAS``), that its saves and deletes increment in any process (e.g. deactivated or with
+    a new password), so a changed user is loaded again. The writes that send no signal (e.g.
+    ``QuerySet.update``) are noticed once the cached entry expires (``USER_TTL``), or right away
+    with ``invalidate_user``. With ``STATELESS`` the user is built from the token claims and never
+    loaded, a deactivated user is accepted until its tokens expire or are revoked. Revoked tokens
+    are rejected with the in-process denylist, cached or not.
+    """
+
+    def get_validated_token(self, raw_token: bytes) -> Token:
+        key = hashlib.sha256(raw_token).digest()
+
+        validated_token = _token_cache.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            _token_cache.set(key, validated_token, ttl=validated_token['exp'] - time.time())
+
+        if denylist.is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken('Token is revoked')
+
+        return validated_token
+
+    def get_user(self, validated_token: Token) -> Any:
+        if settings.JWT_AUTHENTICATION_CACHE['STATELESS']:
+            return api_settings.TOKEN_USER_CLASS(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        # read before the user, a change that commits meanwhile makes the entry stale
+        version = _shared_cache().get(_version_key(user_id), 0)
+        cached = _user_cache.get(user_id)
+        if cached is not None and cached[0] == version:
+            user = cached[1]
+        else:
+            user = super().get_user(validated_token)
+            _user_cache.set(user_id, (version, user))
+
+        return copy.copy(user)  # requests must not share the same instance
+
+
+def _shared_cache() -> Any:
+    return caches[settings.JWT_AUTHENTICATION_CACHE['CACHE_ALIAS']]
+
+
+def _version_key(user_id: Any) -> str:
+    return f'authentication:user:{user_id}'
+
+
+def invalidate_user(user_id: Any, using: str = DEFAULT_DB_ALIAS) -> None:
+    """Make every process load the user again, now and when the transaction commits (a process
+    may have loaded the old row meanwhile).
+    """
+    def invalidate() -> None:
+        cache = _shared_cache()
+        cache.add(_version_key(user_id), 0, None)  # atomic increment of a key that never expires
+        cache.incr(_version_key(user_id))
+
+    invalidate()
+    if connections[using].in_atomic_block:
+        transaction.on_commit(invalidate, using=using)
+
+
+def clear_caches() -> None:
+    _token_cache.clear()
+    _user_cache.clear()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def _evict_user(instance: Any, using: str, **kwargs: Any) -> None:
+    # pylint: disable=unused-argument
+    invalidate_user(getattr(instance, api_settings.USER_ID_FIELD), using)
@@ -0,0 +1,54 @@
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run ``function`` every ``interval()`` seconds in a daemon thread of the process.
+
+    The thread is started by the first ``start`` of the process, so the requests never wait for
+    the function and its queries are not counted in their stats (``service.instrumentation``).
+    ``wake`` runs it again at once. The errors are logged and the database connections of the
+    thread are given back after every run.
+    """
+
+    def __init__(
+        self, name: str, function: Callable[[], None], interval: Callable[[], float]
+    ) -> None:
+        self.name = name
+        self.function = function
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():  # not started yet, or started before a fork
+                threading.Thread(target=self._run, name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                self.function()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('the periodic task %s failed', self.name)
+            finally:
+                connections.close_all()
+
+            self._wake.wait(self.interval())
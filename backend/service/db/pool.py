@@ -0,0 +1,217 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class _PooledConnection:
+    def __init__(self, connection: Any) -> None:
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+        self.uses = 0
+
+
+class ConnectionPool:  # pylint: disable=too-many-instance-attributes
+    """Bounded pool of database connections shared by the threads of a process.
+
+    A connection is checked on checkout (pinged with ``SELECT 1`` once it has been idle for
+    ``check_idle`` seconds) and closed instead of being returned once it is ``max_age`` seconds old
+    or it was used ``max_uses`` times. A checkout waits up to ``timeout`` seconds for a connection
+    when ``max_size`` of them are in use and then raises ``PoolTimeout``.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        connect: Callable[[], Any],
+        max_size: int = 20,
+        timeout: float = 3,
+        max_age: float = 1800,
+        max_uses: int = 10000,
+        check_idle: float = 5,
+    ) -> None:
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.check_idle = check_idle
+
+        self._condition = threading.Condition()
+        self._idle: List[_PooledConnection] = []
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0  # idle, in use and being opened
+        self._waiting = 0
+        self._stats = {
+            'connections': 0, 'checkouts': 0, 'wait_time': 0.0, 'timeouts': 0, 'recycled': 0,
+            'discarded': 0,
+        }
+
+    def getconn(self) -> Any:
+        started = time.monotonic()
+        while True:
+            pooled = self._checkout(started)
+            if pooled is None:
+                pooled = self._open()
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            pooled.uses += 1
+            with self._condition:
+                self._in_use[id(pooled.connection)] = pooled
+                self._stats['checkouts'] += 1
+                self._stats['wait_time'] += time.monotonic() - started
+            return pooled.connection
+
+    def putconn(self, connection: Any) -> None:
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            connection.close()
+            return
+
+        if not self._reset(pooled):
+            self._discard(pooled)
+        elif (
+            time.monotonic() - pooled.created_at >= self.max_age or pooled.uses >= self.max_uses
+        ):
+            self._discard(pooled, 'recycled')
+        else:
+            pooled.returned_at = time.monotonic()
+            with self._condition:
+                self._idle.append(pooled)  # LIFO, the least used connections age out
+                self._condition.notify()
+
+    def close_idle(self) -> None:
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            pooled.connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                **self._stats,
+                'size': self._size,
+                'max_size': self.max_size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+            }
+
+    def _checkout(self, started: float) -> Optional[_PooledConnection]:
+        """Take an idle connection, or a free slot (``None``) to open a new one."""
+        with self._condition:
+            self._waiting += 1
+            try:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = started + self.timeout - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'no database connection available after {self.timeout}s '
+                            f'({self.max_size} in use)'
+                        )
+            finally:
+                self._waiting -= 1
+
+            if self._idle:
+                return self._idle.pop()
+
+            self._size += 1
+            return None
+
+    def _open(self) -> _PooledConnection:
+        try:
+            pooled = _PooledConnection(self.connect())
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._stats['connections'] += 1
+        return pooled
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        connection = pooled.connection
+        if connection.closed or connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - pooled.returned_at < self.check_idle:
+            return True
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _reset(pooled: _PooledConnection) -> bool:
+        connection = pooled.connection
+        if connection.closed:
+            return False
+
+        try:
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            if not connection.autocommit:
+                connection.autocommit = True
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _discard(self, pooled: _PooledConnection, reason: str = 'discarded') -> None:
+        try:
+            pooled.connection.close()
+        finally:
+            with self._condition:
+                self._size -= 1
+                self._stats[reason] += 1
+                self._condition.notify()
+
+
+_pools: Dict[Any, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: Any, connect: Callable[[], Any], options: Dict[str, Any]) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                connect, **{name.lower(): value for name, value in options.items()}
+            )
+        return pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics of the connection pools of this process, by database alias."""
+    with _pools_lock:
+        pools = list(_pools.items())
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for (alias, _), pool in pools:
+        pool_stats = pool.stats()
+        if alias in stats:  # the same alias with other connection parameters (tests)
+            pool_stats = {name: stats[alias][name] + value for name, value in pool_stats.items()}
+        stats[alias] = pool_stats
+    return stats
+
+
+def close_idle_connections() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
@@ -0,0 +1,50 @@
+"""PostgreSQL backend that takes its connections from a per-process ``ConnectionPool``.
+
+Closing a connection (at the end of each request with the default ``CONN_MAX_AGE``) returns it to
+the pool. The pool is configured by the ``POOL`` key of the database settings, with the
+``ConnectionPool`` arguments in upper case. Every statement is counted and timed in the stats of
+the request (``service.instrumentation``).
+"""
+from typing import Any, Dict, Optional
+
+from django.db.backends.postgresql import base, creation
+
+from service.db.pool import ConnectionPool, close_idle_connections, get_pool
+from service.instrumentation import record_query
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name: str, verbosity: int) -> None:
+        close_idle_connections()  # a database can not be dropped while it has connections
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    pool: ConnectionPool
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(record_query)
+        self.isolation_level: Optional[int] = None  # of the connection, set when it is taken
+
+    def get_new_connection(self, conn_params: Dict[str, Any]) -> Any:
+        connect = super().get_new_connection
+
+        self.pool = get_pool(
+            (self.alias, repr(sorted(conn_params.items()))),
+            lambda: connect(conn_params),
+            self.settings_dict.get('POOL', {})
+        )
+        connection = self.pool.getconn()
+
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
@@ -0,0 +1,164 @@
+"""Queries and database time of each request.
+
+The database backend (``service.db.postgresql_pool``) runs every statement through
+``record_query``, which adds it to the ``QueryStats`` of the request being served (a context
+variable, so the statements the async views run in other threads are counted too).
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from service.metrics import observe_request
+
+
+logger = logging.getLogger(__name__)
+
+# characters of the slowest statement in the log line
+_SQL_LOG_LENGTH = 500
+
+
+class QueryStats:
+    """Number, time (in seconds) and slowest of the statements of a request."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql: Optional[str] = None
+
+    def add(self, sql: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            if duration >= self.slowest_duration:
+                self.slowest_duration = duration
+                self.slowest_sql = sql
+
+
+_stats: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+def record_query(
+    execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Any
+) -> Any:
+    """Execute wrapper that counts and times the statement in the stats of the current request."""
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, time.perf_counter() - started)
+
+
+def view_name(request: HttpRequest) -> Optional[str]:
+    """Name of the view that served the request, ``<viewset>.<action>`` for the DRF viewsets."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+
+    view = match.func
+    actions = getattr(view, 'actions', None)
+    if actions and request.method.lower() in actions:  # type: ignore
+        return f'{view.cls.__name__}.{actions[request.method.lower()]}'  # type: ignore
+
+    view_class = getattr(view, 'view_class', None) or getattr(view, 'cls', None)
+    return view_class.__name__ if view_class is not None else view.__name__
+
+
+class QueryInstrumentationMiddleware:
+    """Report the queries of each request in a ``Server-Timing`` header, a JSON log line and the
+    request metrics (``service.metrics``).
+
+    Every request is logged at the INFO level, the requests of a view that ran more queries than
+    its ``QUERY_BUDGETS`` entry at the WARNING level.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[..., Any]) -> None:
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:  # awaited by the ASGI handler, marked like MiddlewareMixin does
+            # pylint: disable=protected-access
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # type: ignore
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.is_async:
+            return self._acall(request)
+
+        stats = QueryStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _stats.reset(token)
+
+        return self._report(request, response, stats, time.perf_counter() - started)
+
+    async def _acall(self, request: HttpRequest) -> HttpResponse:
+        stats = QueryStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _stats.reset(token)
+
+        return self._report(request, response, stats, time.perf_counter() - started)
+
+    @staticmethod
+    def _report(
+        request: HttpRequest, response: HttpResponse, stats: QueryStats, duration: float
+    ) -> HttpResponse:
+        name = view_name(request)
+        response['Server-Timing'] = (
+            f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+            f'total;dur={duration * 1000:.2f}'
+        )
+        response.query_stats = stats  # type: ignore
+        response.view_name = name  # type: ignore
+        observe_request(
+            name, request.method, response.status_code, duration, stats.duration, stats.count
+        )
+
+        budget = settings.QUERY_BUDGETS.get(name) if name is not None else None
+        over_budget = budget is not None and stats.count > budget
+        level = logging.WARNING if over_budget else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(_log_record(request, response, stats, duration, budget)))
+
+        return response
+
+
+def _log_record(
+    request: HttpRequest,
+    response: HttpResponse,
+    stats: QueryStats,
+    duration: float,
+    budget: Optional[int],
+) -> Dict[str, Any]:
+    return {
+        'method': request.method,
+        'path': request.path,
+        'view': response.view_name,  # type: ignore
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'queries': stats.count,
+        'query_budget': budget,
+        'db_ms': round(stats.duration * 1000, 2),
+        'slowest_query_ms': round(stats.slowest_duration * 1000, 2),
+        'slowest_query': (stats.slowest_sql or '')[:_SQL_LOG_LENGTH] or None,
+    }
@@ -0,0 +1,123 @@
+"""Prometheus metrics of the service, exposed by ``service.views.metrics``.
+
+The metrics are kept by ``prometheus_client``: in memory of the process, or in files of the
+``PROMETHEUS_MULTIPROC_DIR`` directory (empty when the service starts) that every process writes
+and the process serving the metrics aggregates when several processes serve the requests.
+The statistics of the database connection pools are read from the pools when the metrics are
+served, of the serving process only in multiprocess mode.
+"""
+import os
+from typing import Iterator, Optional
+
+from prometheus_client import (REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+                               multiprocess)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+
+from service.db.pool import get_pool_stats
+
+
+# in seconds
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_QUERIES_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+# the other methods sent by the clients are counted as "other", a bounded label
+_METHODS = frozenset(
+    ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT')
+)
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by view and response status.', ['view', 'method', 'status']
+)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to serve the requests.', ['view'],
+    buckets=_LATENCY_BUCKETS
+)
+
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Time the requests ran database statements.', ['view'],
+    buckets=_LATENCY_BUCKETS
+)
+
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database statements run by the requests.', ['view'],
+    buckets=_QUERIES_BUCKETS
+)
+
+STOCK_CONFLICTS = Counter(
+    'order_stock_conflicts_total', 'Order writes rejected for insufficient stock.', ['operation']
+)
+
+QUEUED_ORDERS = Counter(
+    'queued_orders_total', 'Queued orders processed by the workers, by outcome.', ['outcome']
+)
+
+EXCHANGE_RATE_FETCHES = Counter(
+    'exchange_rate_fetches_total', 'Upstream exchange rate fetches by outcome.', ['outcome']
+)
+
+
+def observe_request(  # pylint: disable=too-many-arguments
+    view: Optional[str],
+    method: str,
+    status: int,
+    duration: float,
+    db_duration: float,
+    queries: int,
+) -> None:
+    view = view or 'unresolved'  # e.g. not found URLs, a bounded label
+    method = method if method in _METHODS else 'other'
+    REQUESTS.labels(view, method, status).inc()
+    REQUEST_DURATION.labels(view).observe(duration)
+    REQUEST_DB_DURATION.labels(view).observe(db_duration)
+    REQUEST_QUERIES.labels(view).observe(queries)
+
+
+class PoolCollector:
+    """Statistics of the database connection pools of the process (``get_pool_stats``)."""
+
+    _GAUGES = (
+        ('in_use', 'db_pool_connections_in_use', 'Pooled connections checked out.'),
+        ('idle', 'db_pool_connections_idle', 'Pooled connections waiting for a checkout.'),
+        ('size', 'db_pool_connections', 'Pooled connections, idle, in use and being opened.'),
+        ('max_size', 'db_pool_max_connections', 'Maximum pooled connections.'),
+        ('waiting', 'db_pool_waiting_checkouts', 'Checkouts waiting for a connection.'),
+    )
+
+    _COUNTERS = (
+        ('checkouts', 'db_pool_checkouts', 'Connections checked out.'),
+        ('wait_time', 'db_pool_checkout_wait_seconds', 'Time the checkouts waited.'),
+        ('timeouts', 'db_pool_checkout_timeouts', 'Checkouts that timed out.'),
+        ('connections', 'db_pool_opened_connections', 'Connections opened.'),
+        ('recycled', 'db_pool_recycled_connections', 'Connections closed by age or uses.'),
+        ('discarded', 'db_pool_discarded_connections', 'Broken connections closed.'),
+    )
+
+    def collect(self) -> Iterator[Metric]:
+        stats = get_pool_stats()
+        for key, name, documentation in self._GAUGES:
+            gauge = GaugeMetricFamily(name, documentation, labels=['database'])
+            for alias, pool_stats in stats.items():
+                gauge.add_metric([alias], pool_stats[key])
+            yield gauge
+
+        for key, name, documentation in self._COUNTERS:
+            counter = CounterMetricFamily(name, documentation, labels=['database'])
+            for alias, pool_stats in stats.items():
+                counter.add_metric([alias], pool_stats[key])
+            yield counter
+
+
+REGISTRY.register(PoolCollector())
+
+
+def generate() -> bytes:
+    """Metrics in the Prometheus text format, of every process in multiprocess mode."""
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(PoolCollector())
+
+    return generate_latest(registry)
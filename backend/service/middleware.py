@@ -0,0 +1,63 @@
+import hashlib
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from service import routers
+
+
+def _client_key(request: HttpRequest) -> Optional[str]:
+    credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+
+    return f'replica-sticky:{hashlib.sha256(credentials.encode()).hexdigest()}'
+
+
+def _reads_only(request: HttpRequest, view_func: Callable[..., Any]) -> bool:
+    actions = getattr(view_func, 'actions', None)  # DRF viewsets
+    if actions:
+        action = actions.get(request.method.lower())  # type: ignore
+        return action in getattr(view_func.cls, 'read_only_actions', ())  # type: ignore
+
+    return request.method in SAFE_METHODS
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Let the reads of the read-only requests go to the replicas (``service.routers``).
+
+    The DRF viewsets list their read-only actions in ``read_only_actions``, the other views are
+    read-only for the safe methods. After a write the client (told apart by its token or session)
+    reads from the primary for ``REPLICA_STICKINESS`` seconds so it always sees its own writes.
+    """
+
+    def process_view(
+        self, request: HttpRequest, view_func: Callable[..., Any], *args: Any
+    ) -> Optional[HttpResponse]:
+        # pylint: disable=unused-argument
+        if not settings.READ_REPLICAS:
+            return None
+
+        client = _client_key(request)
+        if _reads_only(request, view_func):
+            sticky = client is not None and caches[settings.REPLICA_STICKY_CACHE].get(client)
+            routers.use_replicas(not sticky)
+        elif client is not None:
+            request.replica_sticky_key = client  # type: ignore
+
+        return None
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        routers.use_replicas(False)
+
+        client = getattr(request, 'replica_sticky_key', None)
+        if client is not None:
+            caches[settings.REPLICA_STICKY_CACHE].set(client, True, settings.REPLICA_STICKINESS)
+
+        return response
@@ -0,0 +1,80 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from ecommerce.models import RevokedToken
+from service.background import PeriodicTask
+
+
+# seconds a request waits for the first load of the process
+_LOAD_TIMEOUT = 10
+
+
+class TokenDenylist:
+    """In-process copy of the revoked token ids (``jti``), checking a token is a dict lookup.
+
+    Every ``refresh_interval`` seconds a background thread (``PeriodicTask``) reads the tokens
+    revoked since the previous refresh (looking ``overlap`` seconds back for the revocations
+    committed late), the requests only wait for the first load of the process. An id is dropped,
+    here and in the database, once its token expires since from then on the token is rejected
+    anyway.
+    """
+
+    def __init__(self, refresh_interval: float, overlap: float) -> None:
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+
+        self._revoked: Dict[str, float] = {}
+        self._synced_at: Optional[datetime] = None
+        self._loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._task = PeriodicTask('token-denylist', self.refresh, lambda: self.refresh_interval)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._task.start()
+        if not self._loaded.wait(_LOAD_TIMEOUT):
+            raise DatabaseError('the revoked tokens could not be loaded')
+
+        return jti in self._revoked
+
+    def revoke(self, jti: str, expires_at: datetime) -> None:
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True
+        )
+        RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+
+        with self._lock:
+            self._revoked[jti] = expires_at.timestamp()
+
+    def refresh(self) -> None:
+        with self._lock:
+            now = timezone.now()
+            rows = RevokedToken.objects.filter(expires_at__gt=now)
+            if self._synced_at is not None:
+                rows = rows.filter(revoked_at__gte=self._synced_at - self.overlap)
+
+            revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now.timestamp()}
+            revoked.update(
+                (jti, expires_at.timestamp())
+                for jti, expires_at in rows.values_list('jti', 'expires_at')
+            )
+
+            self._revoked = revoked
+            self._synced_at = now
+        self._loaded.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked = {}
+            self._synced_at = None
+            self._loaded.clear()
+        self._task.wake()
+
+
+denylist = TokenDenylist(
+    settings.TOKEN_DENYLIST['REFRESH_INTERVAL'], settings.TOKEN_DENYLIST['OVERLAP']
+)
@@ -0,0 +1,122 @@
+import random
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from service.background import PeriodicTask
+
+
+# 0 when the replica replayed everything it received, the time since the last replayed
+# transaction otherwise (NULL on a primary, e.g. the test mirror)
+_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+
+class ReplicaHealth:
+    """Replication lag of the replicas, checked every ``REPLICA_CHECK_INTERVAL`` seconds by a
+    background thread (``PeriodicTask``) out of the requests, that read the last result. Only the
+    first check of the process (or after ``clear``) is waited for.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._healthy: Optional[Dict[str, bool]] = None
+        self._generation = 0
+        self._task = PeriodicTask(
+            'replica-health', self.check, lambda: settings.REPLICA_CHECK_INTERVAL
+        )
+
+    def is_healthy(self, alias: str) -> bool:
+        self._task.start()
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._healthy is not None, settings.REPLICA_CHECK_INTERVAL
+            )
+            return bool(self._healthy and self._healthy.get(alias))
+
+    def check(self) -> None:
+        with self._condition:
+            generation = self._generation
+
+        healthy = {alias: self._check(alias) for alias in settings.READ_REPLICAS}
+        with self._condition:
+            if generation == self._generation:  # not cleared meanwhile
+                self._healthy = healthy
+                self._condition.notify_all()
+
+    @staticmethod
+    def _check(alias: str) -> bool:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(_LAG_SQL)
+                lag = cursor.fetchone()[0]
+        except DatabaseError:
+            connections[alias].close()
+            return False
+
+        return float(lag) <= settings.REPLICA_MAX_LAG
+
+    def clear(self) -> None:
+        with self._condition:
+            self._healthy = None
+            self._generation += 1
+        self._task.wake()
+
+
+replica_health = ReplicaHealth()
+
+
+class _RequestRouting:
+    def __init__(self) -> None:
+        self.alias: Optional[str] = None
+
+    def read_alias(self) -> str:
+        if self.alias is None:  # chosen once, every read of the request sees the same snapshot
+            healthy = [
+                alias for alias in settings.READ_REPLICAS if replica_health.is_healthy(alias)
+            ]
+            self.alias = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS  # nosec
+
+        return self.alias
+
+
+_routing: ContextVar[Optional[_RequestRouting]] = ContextVar('routing', default=None)
+
+
+def use_replicas(enabled: bool) -> None:
+    """Let (or stop letting) the reads of the current request or task go to a replica."""
+    _routing.set(_RequestRouting() if enabled else None)
+
+
+class ReplicaRouter:
+    """Send the reads to a replica when ``use_replicas`` was enabled and everything else to the
+    primary, a replica that lags more than ``REPLICA_MAX_LAG`` seconds or is unavailable is skipped.
+    """
+
+    @staticmethod
+    def db_for_read(model: Any, **hints: Any) -> str:
+        # pylint: disable=unused-argument
+        routing = _routing.get()
+        return routing.read_alias() if routing is not None else DEFAULT_DB_ALIAS
+
+    @staticmethod
+    def db_for_write(model: Any, **hints: Any) -> str:
+        # pylint: disable=unused-argument
+        return DEFAULT_DB_ALIAS
+
+    @staticmethod
+    def allow_relation(obj1: Any, obj2: Any, **hints: Any) -> bool:
+        # pylint: disable=unused-argument
+        return True
+
+    @staticmethod
+    def allow_migrate(db: str, app_label: str, **hints: Any) -> bool:
+        # pylint: disable=unused-argument
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,59 @@
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+from typing import Any, Dict
+
+import yaml
+from django.conf import settings
+from rest_framework.renderers import JSONOpenAPIRenderer, OpenAPIRenderer
+from rest_framework.schemas.openapi import SchemaGenerator
+
+
+SCHEMA_INFO = {
+    'title': 'E-commerce example',
+    'description': 'E-commerce endpoints',
+    'version': '1.0.0',
+}
+
+RENDERERS = [OpenAPIRenderer, JSONOpenAPIRenderer]
+
+
+class SchemaDocument:
+    """A rendering of the OpenAPI schema with its gzip compressed body and their strong ETags."""
+
+    def __init__(self, body: bytes, content_type: str) -> None:
+        self.body = body
+        self.gzip_body = gzip.compress(body, mtime=0)
+        self.content_type = content_type
+
+        digest = hashlib.sha256(body).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+
+
+def generate_schema() -> Dict[str, Any]:
+    return SchemaGenerator(**SCHEMA_INFO).get_schema(request=None, public=True)
+
+
+def render_schema(schema: Dict[str, Any], renderer_format: str) -> bytes:
+    renderer = next(renderer for renderer in RENDERERS if renderer.format == renderer_format)
+    return renderer().render(schema)
+
+
+@lru_cache(maxsize=None)
+def get_schema_documents() -> Dict[str, SchemaDocument]:
+    """Render the schema once per process, read from ``OPENAPI_SCHEMA_FILE`` if it exists."""
+    path = settings.OPENAPI_SCHEMA_FILE
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as schema_file:
+            schema = yaml.safe_load(schema_file)  # a JSON document is valid YAML too
+    else:
+        schema = generate_schema()
+
+    return {
+        renderer.format: SchemaDocument(
+            render_schema(schema, renderer.format), renderer.media_type
+        )
+        for renderer in RENDERERS
+    }
@@ -0,0 +1,28 @@
+from typing import Any, Dict
+
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from service.revocation import denylist
+
+
+class TokenRevokeSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value: str) -> RefreshToken:
+        try:
+            return RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error)) from error
+
+
+class DenylistTokenRefreshSerializer(TokenRefreshSerializer):  # pylint: disable=abstract-method
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        refresh = RefreshToken(attrs['refresh'])
+        if denylist.is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken('Token is revoked')
+
+        return super().validate(attrs)
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'service.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'service.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'service.urls'
@@ -62,18 +64,64 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'service.wsgi.application'
 
+# connections are taken from a pool per process (POOL: sizes and timeouts in seconds), checked on
+# checkout after CHECK_IDLE seconds idle and closed after MAX_AGE seconds or MAX_USES checkouts
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'service.db.postgresql_pool',
         'NAME': 'postgres',
         'USER': 'postgres',
         'PASSWORD': os.environ['POSTGRES_PASSWORD'],
         'HOST': 'database',
-        'PORT': 5432
-
+        'PORT': 5432,
+        'POOL': {
+            'MAX_SIZE': 20,
+            'TIMEOUT': 3,
+            'MAX_AGE': 1800,
+            'MAX_USES': 10000,
+            'CHECK_IDLE': 5,
+        },
     }
 }
 
+# read replica, it points to the primary (and mirrors it in the tests) when it is not configured
+
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'HOST': os.environ.get('POSTGRES_REPLICA_HOST', DATABASES['default']['HOST']),
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['service.routers.ReplicaRouter']
+
+# the reads of the read-only requests go to a replica lagging less than REPLICA_MAX_LAG seconds
+# (checked in the background every REPLICA_CHECK_INTERVAL seconds), after a write a client reads
+# from the primary for REPLICA_STICKINESS seconds, wherever its next requests are served
+# (REPLICA_STICKY_CACHE is shared by the processes)
+
+READ_REPLICAS = ['replica'] if os.environ.get('POSTGRES_REPLICA_HOST') else []
+
+REPLICA_MAX_LAG = 5
+
+REPLICA_CHECK_INTERVAL = 5
+
+REPLICA_STICKINESS = 15
+
+REPLICA_STICKY_CACHE = 'default'
+
+# cache shared by the processes of the service (backend, backend_asgi and order_worker), Redis at
+# REDIS_URL, without it (the tests, a single process) each process has its own memory cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -116,11 +164,146 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'service.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-    )
+    ),
+    # the DRF JSON renderer and parser, with orjson
+    'DEFAULT_RENDERER_CLASSES': [
+        'ecommerce.renderers.JsonRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'ecommerce.parsers.JsonParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# cache of the JWT authentication (sizes in entries, TTLs in seconds), the cached users are checked
+# against their version in the shared cache CACHE_ALIAS. With STATELESS the users are built from the
+# token claims without loading them from the database, a deactivation does not apply to them
+
+JWT_AUTHENTICATION_CACHE = {
+    'TOKEN_CACHE_SIZE': 10000,
+    'TOKEN_TTL': 300,
+    'USER_CACHE_SIZE': 10000,
+    'USER_TTL': 5,
+    'CACHE_ALIAS': 'default',
+    'STATELESS': False,
+}
+
+# revoked JWTs, a background thread of each process reloads the ids revoked since its last
+# refresh every REFRESH_INTERVAL seconds, looking OVERLAP seconds back to catch the revocations
+# committed late
+
+TOKEN_DENYLIST = {
+    'REFRESH_INTERVAL': 5,
+    'OVERLAP': 60,
+}
+
+# OpenAPI schema written by the "generate_openapi_schema" command, the schema is generated on the
+# first request when it is not set or the file does not exist
+
+OPENAPI_SCHEMA_FILE = os.environ.get('OPENAPI_SCHEMA_FILE')
+
+# threads that run the ORM work of the async views, each one may hold a database connection
+
+ASYNC_SYNC_WORKERS = 16
+
+# cache of the product responses (invalidated by the product writes), SharedCacheBackend keeps
+# them in the cache "alias" shared by the processes, so the writes of any process (the order
+# worker, the ASGI service) invalidate them. 'ecommerce.cache.LocalCacheBackend' keeps them in the
+# memory of a single process, only its writes invalidate them
+
+PRODUCT_CACHE = {
+    'BACKEND': 'ecommerce.cache.SharedCacheBackend',
+    'OPTIONS': {
+        'alias': 'default',
+        'ttl': 60,
+    },
+}
+
+# responses of the order writes sent with an Idempotency-Key header, replayed to the requests
+# that repeat the key for "ttl" seconds, "lock_ttl" bounds the time a key is held by a request that
+# never finishes. SharedIdempotencyStore keeps them in the cache "alias" shared by the processes,
+# so the duplicates sent to another process (or to the ASGI service) are detected too
+
+IDEMPOTENCY_STORE = {
+    'BACKEND': 'ecommerce.idempotency.SharedIdempotencyStore',
+    'OPTIONS': {
+        'alias': 'default',
+        'ttl': 24 * 60 * 60,
+        'lock_ttl': 30,
+    },
+}
+
+# seconds a repeated request waits for the first request with its key (then it gets a 409), and
+# between its checks
+
+IDEMPOTENCY_WAIT = 10
+
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+# orders a get_totals request can answer, a longer list of orders or a date range matching more
+# orders is rejected
+
+ORDER_TOTALS_LIMIT = 1000
+
+# queued orders (enqueue_order) a process_order_requests worker registers per transaction, and
+# the database errors after which an order is rejected
+
+ORDER_REQUEST_BATCH_SIZE = 100
+
+ORDER_REQUEST_MAX_ATTEMPTS = 3
+
+# queries a request of each view ("<viewset>.<action>" for the viewsets) can run, the requests
+# that run more are logged as warnings and fail BaseApiTestCase.assertQueryBudget
+
+QUERY_BUDGETS = {
+    'ProductViewSet.list': 3,
+    'ProductViewSet.retrieve': 3,
+    'OrderViewSet.register_order': 9,
+    'OrderViewSet.enqueue_order': 3,
+    'OrderViewSet.update_order': 11,
+    'OrderViewSet.destroy': 12,
+    'OrderViewSet.get_total': 3,
+    'OrderRequestViewSet.retrieve': 3,
+}
+
+# the requests over their query budget are logged (JSON, "service.instrumentation" logger) as
+# warnings, set REQUEST_LOG_LEVEL=INFO to log the queries and timings of every request
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'service.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
+# keyset pagination (clients can ask for up to MAX_PAGE_SIZE items with "page_size")
+
+PAGE_SIZE = 100
+
+MAX_PAGE_SIZE = 1000
+
+# products validated and loaded per statement by the bulk product import
+
+PRODUCT_IMPORT_CHUNK_SIZE = 5000
+
+# orders read per query (a keyset range of their date and id) by the order export
+
+ORDER_EXPORT_CHUNK_SIZE = 2000
+
 # django-money (ISO 4217)
 
 moneyed.add_currency(
@@ -133,3 +316,17 @@ moneyed.add_currency(
 CURRENCIES = ('USD', 'ARS')
 
 EXCHANGE_USD = 'https://www.dolarsi.com/api/api.php?type=valoresprincipales'
+
+# the rate is cached for TTL seconds and served stale for STALE_TTL more seconds while it is
+# refreshed, point "url" to a local stub server to work offline
+EXCHANGE_RATE = {
+    'PROVIDER': 'ecommerce.exchange.DolarBlueProvider',
+    'OPTIONS': {
+        'url': os.environ.get('EXCHANGE_USD_URL', EXCHANGE_USD),
+        'timeout': 3,
+        'ttl': 60,
+        'stale_ttl': 600,
+        'failure_threshold': 5,
+        'recovery_timeout': 30,
+    },
+}
@@ -3,20 +3,34 @@ from django.contrib.auth.decorators import login_required
 from django.urls import include, path, re_path
 from django.views.generic import TemplateView
 from rest_framework import routers
-from rest_framework.schemas import get_schema_view
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from ecommerce.views import OrderDetailViewSet, OrderViewSet, ProductViewSet
+from ecommerce import async_views
+from ecommerce.views import OrderDetailViewSet, OrderRequestViewSet, OrderViewSet, ProductViewSet
+from service.serializers import DenylistTokenRefreshSerializer
+from service.views import SchemaView, TokenRevokeView, metrics
 
 
 router = routers.DefaultRouter()
 router.register(r'product', ProductViewSet)
 router.register(r'order', OrderViewSet)
 router.register(r'order_detail', OrderDetailViewSet)
+router.register(r'order_request', OrderRequestViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
 
+    # async endpoints (served without blocking by the ASGI application)
+    re_path(
+        r'^api/(?P<version>v1)/async/',
+        include([
+            path('product/<uuid:pk>/', async_views.product_detail),
+            path('order/register_order/', async_views.register_order),
+            path('order/<int:pk>/', async_views.order_detail),
+            path('order/<int:pk>/get_total_usd/', async_views.get_total_usd),
+        ])
+    ),
+
     # routers
     re_path(r'^api/(?P<version>v1)/', include(router.urls)),
 
@@ -25,18 +39,18 @@ urlpatterns = [
 
     # Authentication
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-
-    # OpenAPI
     path(
-        'openapi-schema/',
-        get_schema_view(
-            title='E-commerce example',
-            description='E-commerce endpoints',
-            version='1.0.0'
-        ),
-        name='openapi-schema'
+        'api/token/refresh/',
+        TokenRefreshView.as_view(serializer_class=DenylistTokenRefreshSerializer),
+        name='token_refresh'
     ),
+    path('api/token/revoke/', TokenRevokeView.as_view(), name='token_revoke'),
+
+    # Prometheus
+    path('metrics', metrics, name='metrics'),
+
+    # OpenAPI
+    path('openapi-schema/', SchemaView.as_view(), name='openapi-schema'),
     path(
         'swagger-ui/',
         login_required(
@@ -1,7 +1,82 @@
+import re
+from typing import Any
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import status
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
 from rest_framework.versioning import URLPathVersioning
+from rest_framework.views import APIView
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from service import metrics as service_metrics
+from service.revocation import denylist
+from service.schema import RENDERERS, get_schema_documents
+from service.serializers import TokenRevokeSerializer
+
+
+_accepts_gzip = re.compile(r'\bgzip\b')
 
 
 class ApiVersioning(URLPathVersioning):
     default_version = 'v1'
     allowed_versions = ['v1']
     version_param = 'version'
+
+
+class TokenRevokeView(GenericAPIView):
+    """Revoke the access token of the request and the given refresh token."""
+
+    serializer_class = TokenRevokeSerializer
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        # pylint: disable=unused-argument
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        tokens = [request.auth] if isinstance(request.auth, Token) else []
+        if 'refresh' in serializer.validated_data:
+            tokens.append(serializer.validated_data['refresh'])
+
+        for token in tokens:
+            denylist.revoke(token[api_settings.JTI_CLAIM], datetime_from_epoch(token['exp']))
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SchemaView(APIView):
+    """Serve the OpenAPI schema rendered once, in YAML or JSON, plain or gzip compressed."""
+
+    renderer_classes = RENDERERS
+    schema = None
+
+    def get(self, request: Request, *args: Any, **kwargs: Any) -> HttpResponse:
+        # pylint: disable=unused-argument
+        document = get_schema_documents()[request.accepted_renderer.format]
+
+        gzipped = bool(_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        etag = document.gzip_etag if gzipped else document.etag
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                document.gzip_body if gzipped else document.body,
+                content_type=document.content_type
+            )
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def metrics(request: HttpRequest) -> HttpResponse:  # pylint: disable=unused-argument
+    """Prometheus metrics, scraped from the internal network (nginx does not expose them)."""
+    return HttpResponse(service_metrics.generate(), content_type=CONTENT_TYPE_LATEST)